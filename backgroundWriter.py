@@ -0,0 +1,178 @@
+import time
+import heapq
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from outputSink import FileSystemSink
+
+DEFAULT_WRITER_THREADS = 4
+DEFAULT_MAX_BUFFERED_BYTES = 64 * 1024 * 1024
+
+
+class BackgroundWriter:
+    """
+    Sink wrapper running the writes of another sink on a small thread pool,
+    so conversion continues while files are written
+
+    - write() blocks while more than max_buffered_bytes are queued (backpressure)
+    - the first failed write is re-raised by the next write() and by flush() (fail fast)
+    - whenWritten() runs a callback once the writes queued before it are done, without waiting for them
+    - makedirs() and exists() run in the caller's thread, folders exist before their files are queued
+    - sinks other than the file system are not thread safe, their writes are serialized
+
+    :param : sink: the wrapped sink (see outputSink)
+    :param : threads: int, number of writer threads
+    :param : max_buffered_bytes: int, cap on queued content, a single larger file is still accepted
+    """
+    def __init__(self, sink, threads: int = DEFAULT_WRITER_THREADS, max_buffered_bytes: int = DEFAULT_MAX_BUFFERED_BYTES):
+        assert isinstance(threads, int) and threads >= 1, "threads needs to be a positive integer"
+        self.sink = sink
+        self.writes_to_folders = sink.writes_to_folders
+        self.max_buffered_bytes = max_buffered_bytes
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="writer")
+        self._sink_lock = None if isinstance(sink, FileSystemSink) else threading.Lock()
+        self._condition = threading.Condition()
+        self._buffered_bytes = 0
+        self._pending = 0
+        self._error = None
+        # writes are numbered in queue order: numbers of the unfinished writes (a heap),
+        # writes finished before an earlier one, callbacks waiting for a number (see whenWritten)
+        self._submitted = 0
+        self._unfinished = []
+        self._finished_early = set()
+        self._callbacks = deque()
+
+        # counters
+        self.num_writes = 0
+        self.num_bytes = 0
+        self.max_queue_depth = 0
+        self.max_buffered = 0
+        self.write_seconds = 0.0
+        self.max_write_seconds = 0.0
+        self.blocked_seconds = 0.0
+
+    def _raiseError(self):
+        if self._error is not None:
+            raise self._error
+
+    def write(self, path: str, content: str):
+        self._submit(len(content.encode("utf-8")), self.sink.write, path, content)
+
+    def linkFile(self, source_path: str, path: str):
+        # links hold no content, they do not count against max_buffered_bytes
+        self._submit(0, self.sink.linkFile, source_path, path)
+
+    def _submit(self, size: int, write, *args):
+        with self._condition:
+            self._raiseError()
+            if self._buffered_bytes and self._buffered_bytes + size > self.max_buffered_bytes:
+                blocked_since = time.perf_counter()
+                while self._error is None and self._buffered_bytes and self._buffered_bytes + size > self.max_buffered_bytes:
+                    self._condition.wait()
+                self.blocked_seconds += time.perf_counter() - blocked_since
+                self._raiseError()
+            self._buffered_bytes += size
+            self._pending += 1
+            self.max_queue_depth = max(self.max_queue_depth, self._pending)
+            self.max_buffered = max(self.max_buffered, self._buffered_bytes)
+            number = self._submitted
+            self._submitted += 1
+            heapq.heappush(self._unfinished, number)
+        self._executor.submit(self._write, number, size, write, *args)
+
+    def _write(self, number: int, size: int, write, *args):
+        start_time = time.perf_counter()
+        error = None
+        try:
+            if self._sink_lock is None:
+                write(*args)
+            else:
+                with self._sink_lock:
+                    write(*args)
+        except BaseException as write_error:
+            error = write_error
+        write_time = time.perf_counter() - start_time
+
+        with self._condition:
+            if error is not None and self._error is None:
+                self._error = error
+            self._buffered_bytes -= size
+            self._pending -= 1
+            self.num_writes += 1
+            self.num_bytes += size
+            self.write_seconds += write_time
+            self.max_write_seconds = max(self.max_write_seconds, write_time)
+            self._finished_early.add(number)
+            while self._unfinished and self._unfinished[0] in self._finished_early:
+                self._finished_early.remove(heapq.heappop(self._unfinished))
+            ready_callbacks = self._readyCallbacks()
+            self._condition.notify_all()
+        for callback in ready_callbacks:
+            callback()
+
+    def _readyCallbacks(self):
+        """
+        Pop the callbacks whose writes are all done, none once a write failed
+        """
+        if self._error is not None:
+            self._callbacks.clear()
+            return []
+        first_unfinished = self._unfinished[0] if self._unfinished else self._submitted
+        ready_callbacks = []
+        while self._callbacks and self._callbacks[0][0] <= first_unfinished:
+            ready_callbacks.append(self._callbacks.popleft()[1])
+        return ready_callbacks
+
+    def whenWritten(self, callback):
+        """
+        Call callback once every write queued so far is done, in the writer thread finishing
+        the last of them (at once when they already are); never called after a failed write
+        """
+        with self._condition:
+            self._callbacks.append((self._submitted, callback))
+            ready_callbacks = self._readyCallbacks()
+        for callback in ready_callbacks:
+            callback()
+
+    def makedirs(self, path: str, exist_ok: bool = False):
+        if self._sink_lock is None:
+            return self.sink.makedirs(path, exist_ok=exist_ok)
+        with self._sink_lock:
+            return self.sink.makedirs(path, exist_ok=exist_ok)
+
+    def exists(self, path: str):
+        if self._sink_lock is None:
+            return self.sink.exists(path)
+        with self._sink_lock:
+            return self.sink.exists(path)
+
+    def flush(self):
+        """
+        Wait for every queued write, re-raise the first failed one
+        """
+        with self._condition:
+            while self._pending:
+                self._condition.wait()
+            self._raiseError()
+        self.sink.flush()
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self._executor.shutdown()
+            self.sink.close()
+
+    def stats(self):
+        with self._condition:
+            return {
+                "writes": self.num_writes,
+                "bytes": self.num_bytes,
+                "queue_depth": self._pending,
+                "max_queue_depth": self.max_queue_depth,
+                "max_buffered_bytes": self.max_buffered,
+                "write_seconds": self.write_seconds,
+                "mean_write_seconds": self.write_seconds / self.num_writes if self.num_writes else 0.0,
+                "max_write_seconds": self.max_write_seconds,
+                "blocked_seconds": self.blocked_seconds,
+            }
@@ -0,0 +1,214 @@
+import os, time, json, shutil, platform, argparse, tempfile, tracemalloc, contextlib
+import statistics, filecmp
+import xmlBackend
+from xmlToHtml import xmlToHtml
+from fetchCourse import fetchCourse, findChapters
+from fetchProblemFromChapter import fetchProblemFromChapter
+from parseCache import parse_cache
+from syntheticCourse import generateCourse, PROBLEM_KINDS
+
+
+def percentile(values: list, fraction: float):
+    """
+    Nearest rank percentile of a non-empty list
+    """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(latencies: list):
+    return {
+        "count": len(latencies),
+        "mean_ms": 1000 * statistics.fmean(latencies),
+        "p50_ms": 1000 * percentile(latencies, 0.50),
+        "p95_ms": 1000 * percentile(latencies, 0.95),
+        "max_ms": 1000 * max(latencies),
+    }
+
+
+@contextlib.contextmanager
+def quiet():
+    """
+    Send the converters' prints and reports to os.devnull while benchmarking
+    """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        yield
+
+
+def peakMemory(function, *args, **kwargs):
+    """
+    Peak Python heap allocation (bytes) while running function, measured with tracemalloc
+    """
+    tracemalloc.start()
+    try:
+        function(*args, **kwargs)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchXmlToHtml(course_directory: str, problem_kinds: dict, repeat: int = 3):
+    """
+    Latency of xmlToHtml per problem kind, parsing included (parse cache disabled)
+
+    :param : problem_kinds: dict, {problem url_name: problem kind}, see generateCourse()
+    """
+    latencies = {kind: [] for kind in set(problem_kinds.values())}
+    cache_size = parse_cache.maxsize
+    parse_cache.resize(0)
+    try:
+        with tempfile.TemporaryDirectory() as output_directory, quiet():
+            def convertAll():
+                for prob_name, kind in problem_kinds.items():
+                    prob_path = os.path.join(course_directory, 'problem', f'{prob_name}.xml')
+                    start_time = time.perf_counter()
+                    xmlToHtml(prob_path, output_directory)
+                    latencies[kind].append(time.perf_counter() - start_time)
+
+            for _ in range(repeat):
+                convertAll()
+            total_time = sum(sum(values) for values in latencies.values())
+            num_converted = sum(len(values) for values in latencies.values())
+            peak_bytes = peakMemory(convertAll)
+    finally:
+        parse_cache.resize(cache_size)
+
+    return {
+        "problems_per_second": num_converted / total_time,
+        "peak_memory_bytes": peak_bytes,
+        "per_kind": {kind: summarize(values) for kind, values in sorted(latencies.items())},
+    }
+
+
+def benchFetchProblemFromChapter(course_directory: str, num_problems: int, jobs_list: list, repeat: int = 3):
+    """
+    Throughput of whole course conversions (fetchProblemFromChapter on every chapter)
+    for every number of worker processes in jobs_list, and peak memory of a serial chapter
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as output_directory, quiet():
+        for jobs in jobs_list:
+            timings = []
+            for _ in range(repeat):
+                shutil.rmtree(output_directory, ignore_errors=True)
+                parse_cache.clear()
+                start_time = time.perf_counter()
+                fetchCourse(course_directory, output_directory, jobs=jobs)
+                timings.append(time.perf_counter() - start_time)
+            results[f"jobs_{jobs}"] = {
+                "best_seconds": min(timings),
+                "problems_per_second": num_problems / min(timings),
+            }
+
+        first_chapter = os.path.join(course_directory, 'chapter', findChapters(course_directory)[0] + '.xml')
+        shutil.rmtree(output_directory, ignore_errors=True)
+        parse_cache.clear()
+        results["chapter_peak_memory_bytes"] = peakMemory(fetchProblemFromChapter, first_chapter, output_directory,
+                                                          course_directory=course_directory)
+    return results
+
+
+def sameTree(directory_a: str, directory_b: str):
+    """
+    True when both directories hold the same files with the same bytes
+    """
+    comparison = filecmp.dircmp(directory_a, directory_b)
+    if comparison.left_only or comparison.right_only or comparison.funny_files:
+        return False
+    _, mismatch, errors = filecmp.cmpfiles(directory_a, directory_b, comparison.common_files, shallow=False)
+    if mismatch or errors:
+        return False
+    return all(sameTree(os.path.join(directory_a, name), os.path.join(directory_b, name))
+               for name in comparison.common_dirs)
+
+
+def benchBackends(course_directory: str, num_problems: int, repeat: int = 3):
+    """
+    Serial course conversion with every installed xml backend (see xmlBackend),
+    and whether their outputs are byte-identical
+    """
+    results = {}
+    previous_backend = xmlBackend.backend.name
+    with tempfile.TemporaryDirectory() as output_root, quiet():
+        try:
+            for name in xmlBackend.availableBackends():
+                xmlBackend.setBackend(name)
+                output_directory = os.path.join(output_root, name)
+                timings = []
+                for _ in range(repeat):
+                    shutil.rmtree(output_directory, ignore_errors=True)
+                    parse_cache.clear()
+                    start_time = time.perf_counter()
+                    fetchCourse(course_directory, output_directory)
+                    timings.append(time.perf_counter() - start_time)
+                results[name] = {
+                    "best_seconds": min(timings),
+                    "problems_per_second": num_problems / min(timings),
+                }
+        finally:
+            xmlBackend.setBackend(previous_backend)
+            parse_cache.clear()
+
+        if len(results) > 1:
+            results["identical_output"] = sameTree(*(os.path.join(output_root, name) for name in results))
+    return results
+
+
+def runBenchmarks(course_directory: str, problem_kinds: dict, jobs_list: list, repeat: int = 3):
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "xml_backend": xmlBackend.backend.name,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "num_problems": len(problem_kinds),
+            "repeat": repeat,
+        },
+        "xmlToHtml": benchXmlToHtml(course_directory, problem_kinds, repeat=repeat),
+        "fetchProblemFromChapter": benchFetchProblemFromChapter(course_directory, len(problem_kinds), jobs_list, repeat=repeat),
+        "xml_backends": benchBackends(course_directory, len(problem_kinds), repeat=repeat),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark xmlToHtml and fetchProblemFromChapter on a synthetic OLX course")
+    parser.add_argument('--chapters', type=int, default=2)
+    parser.add_argument('--sequentials', type=int, default=4, help="sequentials per chapter")
+    parser.add_argument('--verticals', type=int, default=10, help="verticals per sequential")
+    parser.add_argument('--problems', type=int, default=3, help="problems per vertical")
+    parser.add_argument('--mix', default=None,
+                        help="problem mix as kind=weight pairs, e.g. multiple-choice=2,numerical=1; "
+                             f"kinds: {', '.join(PROBLEM_KINDS)}")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--jobs', default="1,4", help="comma separated numbers of worker processes")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default="bench_results.json", help="machine readable results")
+    args = parser.parse_args()
+
+    problem_mix = None
+    if args.mix:
+        problem_mix = {kind: float(weight) for kind, weight in (pair.split('=') for pair in args.mix.split(','))}
+
+    with tempfile.TemporaryDirectory() as course_directory:
+        problem_kinds = generateCourse(course_directory, args.chapters, args.sequentials, args.verticals, args.problems,
+                                       problem_mix=problem_mix, seed=args.seed)
+        results = runBenchmarks(course_directory, problem_kinds, [int(jobs) for jobs in args.jobs.split(',')], args.repeat)
+    results["meta"]["course"] = {"chapters": args.chapters, "sequentials": args.sequentials, "verticals": args.verticals,
+                                 "problems": args.problems, "mix": problem_mix, "seed": args.seed}
+
+    with open(args.output, 'w', encoding='utf-8') as results_file:
+        json.dump(results, results_file, indent=2)
+
+    print(f"xmlToHtml: {results['xmlToHtml']['problems_per_second']:.0f} problems/s")
+    for kind, stats in results["xmlToHtml"]["per_kind"].items():
+        print(f"  {kind}: mean {stats['mean_ms']:.3f} ms, p95 {stats['p95_ms']:.3f} ms")
+    for key, stats in results["fetchProblemFromChapter"].items():
+        if key.startswith("jobs_"):
+            print(f"fetchProblemFromChapter {key}: {stats['problems_per_second']:.0f} problems/s")
+    for name, stats in results["xml_backends"].items():
+        if name in xmlBackend.BACKENDS:
+            print(f"xml backend {name}: {stats['problems_per_second']:.0f} problems/s")
+    if "identical_output" in results["xml_backends"]:
+        print(f"xml backends identical output: {results['xml_backends']['identical_output']}")
+    print(f"results written to {args.output}")
@@ -0,0 +1,79 @@
+import os
+import json
+import threading
+
+
+def journalPath(output_directory: str, chapter_name: str):
+    return os.path.join(output_directory, f".convert_journal_{chapter_name}.jsonl")
+
+
+class ConversionJournal:
+    """
+    Append-only journal of the converted problems of a chapter, one json line
+    {"index", "problem", "question"} per problem, so a run that crashed can be resumed:
+    the rerun traverses the chapter again (rebuilding the zones) and only converts
+    the problems that are not journaled with the same position, url_name and question id
+
+    A problem is recorded once its files are written: by its worker process, or by the sink
+    once the writes queued up to the problem are done (see recordWhenWritten), the write queue
+    is never drained for it. Each record is appended (and flushed) as it arrives, so a run
+    interrupted at any point resumes right after its last completed problem.
+    The journal is removed once the chapter is complete (see fetchProblemFromChapter)
+    """
+    def __init__(self, path: str, resume: bool = False):
+        self.path = path
+        self.completed = dict() # {index: (problem url_name, question id)} of the previous run
+        if resume:
+            self.completed = self.load(path)
+        self._lock = threading.Lock()
+        # rewritten with the entries read, without resume a journal of an earlier run is started over
+        self._file = open(path, "w", encoding="utf-8")
+        for index, (prob_name, question_id) in sorted(self.completed.items()):
+            self.record(index, prob_name, question_id)
+
+    @staticmethod
+    def load(path: str):
+        completed = dict()
+        try:
+            with open(path, "r", encoding="utf-8") as journal_file:
+                for line in journal_file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break # last line of a crashed run may be cut off
+                    completed[entry["index"]] = (entry["problem"], entry["question"])
+        except FileNotFoundError:
+            pass
+        return completed
+
+    def isCompleted(self, index: int, prob_name: str, question_id: str):
+        return self.completed.get(index) == (prob_name, question_id)
+
+    def record(self, index: int, prob_name: str, question_id: str):
+        """
+        Mark a problem as converted, thread safe (called from future and writer callbacks)
+        """
+        line = json.dumps({"index": index, "problem": prob_name, "question": question_id}) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def recordWhenDone(self, future, index: int, prob_name: str, question_id: str):
+        """
+        Record the problem once its conversion in a process pool succeeded
+        """
+        def recordSucceeded(done_future):
+            if not done_future.cancelled() and done_future.exception() is None:
+                self.record(index, prob_name, question_id)
+        future.add_done_callback(recordSucceeded)
+
+    def recordWhenWritten(self, sink, index: int, prob_name: str, question_id: str):
+        """
+        Record the problem once the files it queued in sink are written (see backgroundWriter)
+        """
+        sink.whenWritten(lambda: self.record(index, prob_name, question_id))
+
+    def close(self, remove: bool = False):
+        self._file.close()
+        if remove:
+            os.remove(self.path)
@@ -0,0 +1,150 @@
+import os
+import sys
+import json
+import queue
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener
+
+LOGGER_NAME = "converter"
+LOG_LEVELS = ("debug", "info", "warning", "error")
+# bytes of records buffered before they are written into the log file
+LOG_BUFFER_BYTES = 1 << 16
+
+# the converter's logger, modules take a child: logging.getLogger(f"{LOGGER_NAME}.{module}"),
+# without configureLogging() nothing is formatted below WARNING
+logger = logging.getLogger(LOGGER_NAME)
+
+_listener = None
+
+
+def getLogger(module: str):
+    return logging.getLogger(f"{LOGGER_NAME}.{module}")
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    One json object per record: {"time", "level", "logger", "event", ...fields},
+    the fields are passed as logger.debug(event, extra={"fields": {...}})
+    """
+    def format(self, record):
+        entry = {
+            "time": round(record.created, 6),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class BufferedFileHandler(logging.Handler):
+    """
+    Appends records to a file in blocks of about buffer_bytes whole lines,
+    warnings and errors are written at once
+
+    The file is opened in append mode, lines of forked worker processes
+    (see ParentQueueHandler) land between the blocks, never inside a line
+    """
+    def __init__(self, log_path: str, buffer_bytes: int = LOG_BUFFER_BYTES):
+        super().__init__()
+        open(log_path, "wb").close()
+        self.buffer_bytes = buffer_bytes
+        self._file = open(log_path, "ab", buffering=0)
+        self._lines = []
+        self._size = 0
+
+    def emit(self, record):
+        try:
+            line = (self.format(record) + "\n").encode("utf-8")
+        except Exception:
+            self.handleError(record)
+            return
+        self._lines.append(line)
+        self._size += len(line)
+        if self._size >= self.buffer_bytes or record.levelno >= logging.WARNING:
+            self.flush()
+
+    def flush(self):
+        if self._lines:
+            self._file.write(b"".join(self._lines))
+            self._lines = []
+            self._size = 0
+
+    def close(self):
+        self.flush()
+        self._file.close()
+        super().close()
+
+
+class ParentQueueHandler(QueueHandler):
+    """
+    QueueHandler of the process that configured logging; a forked worker process
+    inherits the handler but not the listener thread, it writes its records itself
+    """
+    def __init__(self, log_queue, log_path: str = None):
+        super().__init__(log_queue)
+        self.log_path = log_path
+        self._pid = os.getpid()
+        self._fallback = None
+
+    def prepare(self, record):
+        # the queue stays in this process, the record is formatted by the listener thread
+        return record
+
+    def emit(self, record):
+        if os.getpid() == self._pid:
+            super().emit(record)
+            return
+        if self._fallback is None:
+            if self.log_path is None:
+                self._fallback = logging.StreamHandler(sys.stderr)
+            else:
+                self._fallback = logging.FileHandler(self.log_path, mode="a", encoding="utf-8")
+            self._fallback.setFormatter(JsonLinesFormatter())
+        self._fallback.handle(record)
+
+
+def configureLogging(level: str = "info", log_path: str = None):
+    """
+    Send the converter's events as json lines to log_path (stderr without it):
+    callers only put records on a queue, a listener thread formats and writes them
+    in blocks (see BufferedFileHandler). Disabled levels cost a level check, callers building
+    expensive fields check logger.isEnabledFor(level) first
+
+    :param : level: str, one of LOG_LEVELS
+    """
+    global _listener
+    assert level in LOG_LEVELS, f"level needs to be one of {', '.join(LOG_LEVELS)}"
+    stopLogging()
+
+    if log_path is None:
+        stream_handler = logging.StreamHandler(sys.stderr)
+    else:
+        stream_handler = BufferedFileHandler(log_path)
+    stream_handler.setFormatter(JsonLinesFormatter())
+
+    log_queue = queue.SimpleQueue()
+    logger.handlers = [ParentQueueHandler(log_queue, log_path)]
+    logger.setLevel(level.upper())
+    logger.propagate = False
+    _listener = QueueListener(log_queue, stream_handler)
+    _listener.start()
+
+
+def stopLogging():
+    """
+    Write the queued records and close the log, called at exit
+    """
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+    logger.handlers = []
+
+atexit.register(stopLogging)
@@ -0,0 +1,284 @@
+import os, sys, json, time, argparse, cProfile
+from concurrent.futures import ProcessPoolExecutor
+from collections import Counter
+from fetchProblemFromChapter import fetchProblemFromChapter, chapterFolder, UNSUPPORTED_MODES
+from olxStream import readRootAttrib
+from parseCache import parseXml, parse_cache, DEFAULT_CACHE_SIZE
+from stageTimer import enableTiming
+import olxSource
+from outputSink import openSink, FILE_SYSTEM_SINK
+from nameRegistry import NameRegistry
+from memoryTracker import MemoryTracker
+from problemDedup import ProblemDeduplicator
+from validateOutput import validateTree, printValidation
+from backgroundWriter import BackgroundWriter, DEFAULT_MAX_BUFFERED_BYTES
+from eventLog import configureLogging, getLogger, LOG_LEVELS
+
+COURSE_SUMMARY_FILENAME = "courseSummary.json"
+
+log = getLogger("fetchCourse")
+
+
+def findChapters(course_directory: str):
+    """
+    Find chapter url_names of an OLX export in course order:
+    course.xml (root)
+      |--course/<url_name>.xml
+            |--chapter
+
+    :param : course_directory: str, (relative) path to the OLX export folder or .tar.gz archive
+    :return: list of chapter url_names
+    """
+    course_root = parseXml(os.path.join(course_directory, 'course.xml')).getroot()
+
+    # some exports inline the whole course into course.xml
+    if course_root.find('chapter') is None:
+        course_path = os.path.join(course_directory, 'course', course_root.get('url_name') + '.xml')
+        course_root = parseXml(course_path).getroot()
+
+    return [chapter.get('url_name') for chapter in course_root.findall('chapter')]
+
+
+def assignChapterNumbers(course_directory: str, chapter_names: list):
+    """
+    Distinct chapter numbers, each chapter gets its own c<number> output folder and assessment number:
+    the number in its display_name when no chapter before it claims that number, otherwise
+    (or without a number) its course position, or the next number no chapter claims
+
+    :param : chapter_names: list of chapter url_names in course order (see findChapters)
+    :return: {chapter url_name: chapter number as str}
+    """
+    wanted_numbers = dict()
+    for chapter_name in chapter_names:
+        display_name = readRootAttrib(os.path.join(course_directory, 'chapter', f'{chapter_name}.xml')).get('display_name', '')
+        try:
+            wanted_numbers[chapter_name] = chapterFolder(display_name)[1]
+        except AttributeError: # no number in the display_name
+            wanted_numbers[chapter_name] = None
+
+    numbers = dict()
+    for chapter_name in chapter_names:
+        if wanted_numbers[chapter_name] is not None and wanted_numbers[chapter_name] not in numbers.values():
+            numbers[chapter_name] = wanted_numbers[chapter_name]
+    taken = set(numbers.values())
+    for position, chapter_name in enumerate(chapter_names, 1):
+        if chapter_name in numbers:
+            continue
+        while str(position) in taken:
+            position += 1
+        numbers[chapter_name] = str(position)
+        taken.add(numbers[chapter_name])
+        reason = (f"number {wanted_numbers[chapter_name]} is taken by an earlier chapter"
+                  if wanted_numbers[chapter_name] is not None else "no number in its display_name")
+        log.warning(f"chapter {chapter_name}: {reason}, converted as chapter {numbers[chapter_name]}",
+                    extra={"fields": {"chapter": chapter_name, "wanted": wanted_numbers[chapter_name],
+                                      "number": numbers[chapter_name]}})
+    return numbers
+
+
+def writeCourseSummary(report: list, plans: list, output_base_directory: str, sink=None):
+    """
+    Course level COURSE_SUMMARY_FILENAME listing the assessment of every chapter
+
+    :param : report: list of [chapter url_name, number of problems, ...] per chapter, see fetchCourse()
+    :param : plans: list of the plans filled by fetchProblemFromChapter(), same order as report
+    """
+    if sink is None:
+        sink = FILE_SYSTEM_SINK
+
+    chapters = []
+    for (chapter_name, num_problems, *_), plan in zip(report, plans):
+        chapters.append({
+            "url_name": chapter_name,
+            "title": plan["assessment_title"],
+            "number": plan["assessment_number"],
+            "directory": os.path.relpath(plan["output_directory"], output_base_directory).replace(os.sep, '/'),
+            "problems": num_problems,
+            "problem_types": dict(sorted(plan["problem_types"].items())),
+        })
+    problem_types = sum((Counter(chapter["problem_types"]) for chapter in chapters), Counter())
+    summary = {"chapters": chapters, "problems": sum(chapter["problems"] for chapter in chapters),
+               "problem_types": dict(sorted(problem_types.items()))}
+
+    sink.write(os.path.join(output_base_directory, COURSE_SUMMARY_FILENAME),
+               json.dumps(summary, indent=4, ensure_ascii=False) + "\n")
+    sink.flush()
+
+
+def fetchCourse(course_directory: str, output_base_directory: str, jobs: int = 1, incremental: bool = False,
+                sink=None, low_memory: bool = False, max_memory_bytes: int = None, dedup: bool = False,
+                unsupported: str = "convert", resume: bool = False):
+    """
+    Convert every chapter of an OLX export in one process
+    using fetchProblemFromChapter() for each chapter, the output is the same as
+    converting the chapters one by one in course order, followed by COURSE_SUMMARY_FILENAME
+
+    :param : course_directory: str, (relative) path to the OLX export folder or .tar.gz archive
+    :param : output_base_directory: str, (relative) path to output folder
+    :param : jobs: int, number of worker processes, the pool is shared by all chapters
+    :param : incremental: bool, only convert problems changed since the previous run
+    :param : sink: where the files go (see outputSink), defaults to the file system
+    :param : low_memory: bool, disable the parse cache and keep no parsed tree
+             beyond its conversion (see fetchProblemFromChapter)
+    :param : max_memory_bytes: int, fail with MemoryError as soon as the RSS of
+             this process is above it
+    :param : dedup: bool, convert problems with identical (normalized) content once,
+             the zones of every assessment point to that question (see problemDedup)
+    :param : resume: bool, continue an interrupted run into the same output folder,
+             problems converted before the interruption are not converted again
+    :param : unsupported: str, "convert", "skip" or "quarantine" problems xmlToHtml cannot
+             convert (see fetchProblemFromChapter)
+    :return: list of (chapter url_name, number of problems, seconds, peak RSS in bytes) per chapter,
+             seconds of traversing the chapter and of waiting for its conversions
+    """
+    assert isinstance(course_directory, str)
+    assert isinstance(output_base_directory, str)
+    assert isinstance(jobs, int) and jobs >= 1, "jobs needs to be a positive integer"
+
+    chapter_directory = os.path.join(course_directory, 'chapter')
+    # index an archived export before the pool starts, forked workers inherit the index
+    if olxSource.isArchive(course_directory):
+        olxSource.openArchive(course_directory)
+    # before the pool starts, forked workers inherit the disabled cache
+    if low_memory:
+        parse_cache.resize(0)
+    memory_tracker = MemoryTracker(max_memory_bytes)
+    deduplicator = ProblemDeduplicator() if dedup else None
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+
+    # every chapter converts into its own c<number> folder
+    chapter_names = findChapters(course_directory)
+    chapter_numbers = assignChapterNumbers(course_directory, chapter_names)
+    name_registry = NameRegistry()
+
+    # every chapter is traversed in course order while the pool converts the problems
+    # of the chapters before it, the merge step below waits for the conversions and
+    # writes the infoAssessment.json files in the same order (low memory mode finishes
+    # each chapter before the next one to bound the pending conversions)
+    deferred_chapters = None if low_memory else []
+    plans = []
+    report = []
+    start_time = time.perf_counter()
+    try:
+        for chapter_name in chapter_names:
+            chapter_start_time = time.perf_counter()
+            memory_tracker.reset()
+            plan = dict()
+            num_problems = fetchProblemFromChapter(os.path.join(chapter_directory, f'{chapter_name}.xml'),
+                                                   output_base_directory, jobs=jobs,
+                                                   course_directory=course_directory, executor=executor,
+                                                   incremental=incremental, sink=sink, name_registry=name_registry,
+                                                   low_memory=low_memory, memory_tracker=memory_tracker,
+                                                   deduplicator=deduplicator, plan=plan,
+                                                   chapter_number=chapter_numbers[chapter_name],
+                                                   deferred_chapters=deferred_chapters, unsupported=unsupported,
+                                                   resume=resume)
+            memory_tracker.check(chapter_name)
+            plans.append(plan)
+            report.append([chapter_name, num_problems, time.perf_counter() - chapter_start_time,
+                           memory_tracker.peak_bytes])
+
+        # merge step
+        for chapter_report, finishChapter in zip(report, deferred_chapters or []):
+            finish_start_time = time.perf_counter()
+            finishChapter()
+            chapter_report[2] += time.perf_counter() - finish_start_time
+        writeCourseSummary(report, plans, output_base_directory, sink=sink)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    total_time = time.perf_counter() - start_time
+
+    print('='*20, file=sys.stderr)
+    for chapter_name, num_problems, chapter_time, peak_bytes in report:
+        print(f"chapter {chapter_name}: {num_problems} problems in {chapter_time:.2f}s, "
+              f"peak RSS {peak_bytes / 2**20:.1f} MiB", file=sys.stderr)
+    print(f"total: {sum(r[1] for r in report)} problems in {len(report)} chapters, {total_time:.2f}s", file=sys.stderr)
+    problem_types = sum((plan["problem_types"] for plan in plans), Counter())
+    print("problem types: " + ", ".join(f"{problem_type} {count}" for problem_type, count in sorted(problem_types.items()))
+          + ("" if unsupported == "convert" else f" (unsupported: {unsupported})"), file=sys.stderr)
+    # worker processes keep their own caches, these are the numbers of this process
+    cache_stats = parse_cache.stats()
+    print(f"parse cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses", file=sys.stderr)
+    if deduplicator is not None:
+        num_converted = sum(r[1] for r in report)
+        dedup_stats = deduplicator.summary(seconds_per_problem=total_time / num_converted if num_converted else None)
+        disk_saved = (f"{dedup_stats['bytes_saved'] / 2**10:.1f} KiB" if dedup_stats['bytes_saved'] is not None
+                      else "unknown (archive output)")
+        print(f"dedup: {dedup_stats['duplicates']} duplicates of {dedup_stats['distinct']} distinct problems, "
+              f"saved ~{dedup_stats['seconds_saved'] or 0:.2f}s, disk {disk_saved}", file=sys.stderr)
+
+    return [tuple(chapter_report) for chapter_report in report]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert every chapter of an OLX course export")
+    parser.add_argument('course_directory', help="OLX export containing course.xml, a folder or a .tar.gz archive")
+    parser.add_argument('output_base_directory', help="output folder")
+    parser.add_argument('--jobs', type=int, default=1, help="number of worker processes")
+    parser.add_argument('--incremental', action='store_true',
+                        help="only convert problems changed since the previous run into the same output folder")
+    parser.add_argument('--resume', action='store_true',
+                        help="continue an interrupted run into the same output folder")
+    parser.add_argument('--archive', default=None,
+                        help="write the whole tree into this .zip, .tar or .tar.gz instead of output_base_directory, "
+                             "member names are relative to output_base_directory")
+    parser.add_argument('--writer-threads', type=int, default=0,
+                        help="write files on this many background threads while converting, 0 writes inline")
+    parser.add_argument('--max-buffered-mb', type=float, default=DEFAULT_MAX_BUFFERED_BYTES / 2**20,
+                        help="cap on file content queued for the writer threads")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE,
+                        help="number of parsed OLX documents kept in memory, 0 disables the cache")
+    parser.add_argument('--low-memory', action='store_true',
+                        help="disable the parse cache and release every parsed problem right after its conversion")
+    parser.add_argument('--max-memory-mb', type=float, default=None,
+                        help="stop with an error as soon as the memory (RSS) of the converter is above this")
+    parser.add_argument('--dedup', action='store_true',
+                        help="convert identical problems once, assessments share the converted question")
+    parser.add_argument('--validate', action='store_true',
+                        help="check the generated files afterwards (see validateOutput), exits with 1 on errors")
+    parser.add_argument('--unsupported', choices=UNSUPPORTED_MODES, default="convert",
+                        help="problems without a multiple choice, checkbox or numerical response: convert them "
+                             "like the others, skip them, or copy their source into unsupported/")
+    parser.add_argument('--timing-report', default=None,
+                        help="write per stage timings and the slowest problems into this .json file")
+    parser.add_argument('--slowest', type=int, default=10, help="number of slowest problems in the timing report")
+    parser.add_argument('--profile', default=None, help="dump cProfile stats of the run into this file")
+    parser.add_argument('--log', default=None, help="write the event log (json lines) into this file instead of stderr")
+    parser.add_argument('--log-level', choices=LOG_LEVELS, default="info",
+                        help="debug logs every sequential, vertical and problem")
+    args = parser.parse_args()
+
+    assert not (args.validate and args.archive), "--validate checks an output folder, not an archive"
+    configureLogging(args.log_level, args.log)
+    parse_cache.resize(args.cache_size)
+    timer = enableTiming() if args.timing_report is not None else None
+    profile = cProfile.Profile() if args.profile is not None else None
+
+    if profile is not None:
+        profile.enable()
+    sink = openSink(args.archive, root=args.output_base_directory)
+    if args.writer_threads > 0:
+        sink = BackgroundWriter(sink, threads=args.writer_threads, max_buffered_bytes=int(args.max_buffered_mb * 2**20))
+    try:
+        fetchCourse(args.course_directory, args.output_base_directory, jobs=args.jobs, incremental=args.incremental,
+                    sink=sink, low_memory=args.low_memory, dedup=args.dedup, unsupported=args.unsupported,
+                    resume=args.resume,
+                    max_memory_bytes=int(args.max_memory_mb * 2**20) if args.max_memory_mb is not None else None)
+    finally:
+        sink.close()
+    if args.writer_threads > 0:
+        writer_stats = sink.stats()
+        print(f"writer: {writer_stats['writes']} writes, max queue depth {writer_stats['max_queue_depth']}, "
+              f"mean write {1000 * writer_stats['mean_write_seconds']:.2f} ms, "
+              f"blocked {writer_stats['blocked_seconds']:.2f}s", file=sys.stderr)
+    if profile is not None:
+        profile.disable()
+        profile.dump_stats(args.profile)
+    if timer is not None:
+        timer.writeReport(args.timing_report, slowest=args.slowest)
+    if args.validate:
+        errors_by_path, num_files = validateTree(args.output_base_directory, jobs=args.jobs)
+        printValidation(errors_by_path, num_files)
+        if errors_by_path:
+            sys.exit(1)
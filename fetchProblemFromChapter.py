@@ -1,31 +1,75 @@
-import os, re, sys
-import xml.etree.ElementTree as ET
-from xmlToJson import xmlToJson
-from xmlToHtml import xmlToHtml
+import os, re
+import logging
+from collections import deque, Counter
+from concurrent.futures import ProcessPoolExecutor
+from parseCache import parseXml, parse_cache
+from olxStream import readRootAttrib, iterChapterProblems
+from stageTimer import stage, enableTiming, activeTimer
+from outputSink import FILE_SYSTEM_SINK, MemorySink, LinkedFile
+from incremental import hashProblem, loadManifest, saveManifest, manifestFolders, removeStaleFolders
+from nameRegistry import NameRegistry, sanitizeFolderName
+from conversionJournal import ConversionJournal, journalPath
+from problemDedup import normalizedHash
+from problemScan import scanProblemType, UNSUPPORTED
+from xmlToJson import xmlToJson, JSON_OUTPUT_FILENAME
+from xmlToHtml import xmlToHtml, HTML_OUTPUT_FILENAME, PYTHON_OUTPUT_FILENAME
 from writeAssessJson import writeAssessJson
+from eventLog import getLogger, configureLogging
 """
 TODO:
 - in programming problems, xmlToHtml has problem with detecting <label> element
 """
 
+# what happens to problems xmlToHtml cannot convert (see problemScan):
+# "convert" keeps them like the other problems (an info.json without question.html),
+# "skip" leaves them out, "quarantine" copies their source into QUARANTINE_DIRECTORY
+UNSUPPORTED_MODES = ("convert", "skip", "quarantine")
+QUARANTINE_DIRECTORY = "unsupported"
+
+# chapter summaries at INFO, every sequential, vertical and problem at DEBUG (see eventLog)
+log = getLogger("fetchProblemFromChapter")
+
 def stringToFilename(input_string):
     """
-    Convert string into filename
-    i.e replace . - and space
+    Convert string into filename, see nameRegistry.sanitizeFolderName
     """
     assert isinstance(input_string, str)
+    return sanitizeFolderName(input_string)
 
-    # Define a translation table to remove spaces, hyphens, and dots
-    translator = str.maketrans(" -.", "___", "_")
+def chapterFolder(chapter_display_name: str, chapter_number: str = None):
+    """
+    Output folder name and number of a chapter, "Chapter 3: ..." -> ("c3", "3"),
+    chapter_number (see fetchCourse.assignChapterNumbers) replaces the number in the display_name
+    """
+    if chapter_number is None:
+        chapter_number = re.search(r'\d{1,2}', chapter_display_name).group()
+    return 'c' + chapter_number, chapter_number
 
-    # Apply the translation to the input string
-    sanitized_string = input_string.translate(translator)
+def sequentialFolder(seq_display_name: str):
+    """
+    Output (sub topic) folder name and number of a sequential, "3.1 ..." -> ("s1", "1"),
+    ("prog", None) when its title has no section number
+    """
+    sub_topic_number_match = re.search(r'\.(\d{1,2})', seq_display_name)
+    if sub_topic_number_match:
+        return 's' + sub_topic_number_match.group(1), sub_topic_number_match.group(1)
+    return 'prog', None
 
-    # Ensure the filename is not empty
-    if not sanitized_string:
-        sanitized_string = "default_filename"  # Provide a default filename if the input string is empty
+def convertedFilenames(problem_type: str):
+    """
+    Files a conversion writes into the folder of a problem of problem_type (see problemScan)
+    """
+    if problem_type == UNSUPPORTED:
+        return (JSON_OUTPUT_FILENAME,)
+    if problem_type == "numerical":
+        return (JSON_OUTPUT_FILENAME, HTML_OUTPUT_FILENAME, PYTHON_OUTPUT_FILENAME)
+    return (JSON_OUTPUT_FILENAME, HTML_OUTPUT_FILENAME)
 
-    return sanitized_string
+def problemFolder(prob_display_name: str):
+    """
+    Wanted output folder name of a problem, made unique by NameRegistry.allocate
+    """
+    return 'p' + prob_display_name[:30]
 
 def find_first_letter_index(s):
     for index, char in enumerate(s):
@@ -40,8 +84,55 @@ def get_substring_to_first_letter(s):
     else:
         return s 
 
+def convertProblem(prob_path: str, prob_name: str, question_title: str, topic: str, tags: list, output_prob_path: str,
+                   timed: bool = False, sink=None, capture: bool = False, question_id: str = None):
+    """
+    Convert a single problem into its (already created) output folder
+    i.e. .json and .html (and .py for numerical response problems)
 
-def fetchProblemFromChapter(chapter_xml_file: str, output_base_directory: str):
+    Module level so that it can be sent to a process pool
+
+    :param : timed: bool, record stage timings, also in a fresh worker process
+    :param : question_id: str, question folder relative to the course output, part of the question uuid
+    :param : sink: where the files go (see outputSink), defaults to the file system
+    :param : capture: bool, keep the files in memory and return them instead,
+             used by worker processes that cannot write into the caller's sink
+    :return: ({stage: seconds} when timed else None, {path: content} when capture else None)
+    """
+    if timed:
+        enableTiming()
+    if capture:
+        sink = MemorySink()
+    xmlToJson(question_title=question_title, topic=topic, tags=tags, output_base_directory=output_prob_path, source_url=prob_name,
+              sink=sink, question_id=question_id)
+    xmlToHtml(prob_path=prob_path, output_base_directory=output_prob_path, sink=sink)
+
+    stage_seconds = activeTimer().take(prob_name) if timed else None
+    return stage_seconds, (sink.files if capture else None)
+
+
+def finishConversion(prob_name: str, future, sink, timer):
+    """
+    Wait for a conversion submitted to a process pool, write the files it captured
+    and collect its stage timings, re-raises a failed conversion
+    """
+    stage_seconds, captured_files = future.result()
+    if captured_files is not None:
+        with stage(prob_name, "write"):
+            for path, content in captured_files.items():
+                if isinstance(content, LinkedFile):
+                    sink.linkFile(content.source_path, path)
+                else:
+                    sink.write(path, content)
+    if timer is not None:
+        timer.add(prob_name, stage_seconds)
+
+
+def fetchProblemFromChapter(chapter_xml_file: str, output_base_directory: str, jobs: int = 1,
+                            course_directory: str = '', executor=None, incremental: bool = False, sink=None,
+                            name_registry=None, plan=None, low_memory: bool = False, memory_tracker=None,
+                            deduplicator=None, assessment_number: str = None, deferred_chapters: list = None,
+                            unsupported: str = "convert", resume: bool = False, chapter_number: str = None):
     """
     Iterating through xml tree:
     chapter (root)
@@ -54,159 +145,318 @@ def fetchProblemFromChapter(chapter_xml_file: str, output_base_directory: str):
 
     :param : chapter_xml_file: str, (relative) path to chapter.xml 
     :param : output_base_directory: str, (relative) path to output folder
+    :param : jobs: int, number of worker processes converting problems,
+             1 converts in the current process. Folder names and zones are
+             always resolved in traversal order, so the output does not depend on jobs
+    :param : course_directory: str, root of the OLX export holding sequential/, vertical/ and problem/,
+             a folder or a .tar.gz archive read without extracting it (see olxSource),
+             defaults to the current working directory
+    :param : executor: optional shared process pool (see fetchCourse), overrides jobs
+    :param : incremental: bool, problems whose source hash matches the manifest
+             of the previous run into the same output folder (and whose files are still there)
+             are not converted again,
+             folders of that run this run does not write (renamed or removed problems) are removed
+    :param : sink: where the files go (see outputSink), defaults to the file system
+    :param : name_registry: NameRegistry resolving folder name conflicts, share one between
+             chapters converted into the same output folder (see fetchCourse)
+    :param : plan: optional dict, filled with the chapter "output_directory", "assessment_title",
+             "assessment_number", the "problem_types" Counter of every problem and the
+             convertProblem() keyword arguments of its "problems" in traversal order (see watchCourse)
+    :param : low_memory: bool, problems are traversed without building their tree and at most
+             2 * jobs conversions wait in the pool, the parse cache of this process is disabled
+             (it stays disabled afterwards), so no parsed tree outlives its conversion;
+             disable it before starting a shared executor so its workers inherit it (see fetchCourse)
+    :param : memory_tracker: optional MemoryTracker sampled after every problem (see memoryTracker)
+    :param : deduplicator: optional ProblemDeduplicator (see problemDedup), a problem with the same
+             content as an already converted one is not converted again, its zone entry points to
+             that question. A question is listed at most once per assessment, a repeat within
+             the chapter gets its own copy
+    :param : chapter_number: str, names the output folder c<chapter_number>, defaults to the number
+             in the chapter display_name; chapters converted into one output_base_directory need
+             distinct numbers (see fetchCourse.assignChapterNumbers)
+    :param : assessment_number: str, number of the assessment, defaults to the chapter number
+    :param : unsupported: str, one of UNSUPPORTED_MODES, unsupported problems are found
+             from the raw bytes before any tree is built (see problemScan)
+    :param : resume: bool, continue an interrupted run into the same output folder: problems
+             journaled as converted (see conversionJournal) are not converted again
+    :param : deferred_chapters: optional list, the chapter is not finished here but a callable
+             is appended that waits for its conversions and writes its infoAssessment.json,
+             so the conversions of the following chapters can start meanwhile (see fetchCourse)
+    :return: int, number of converted problems
     """
-    verbose = True
+    assert isinstance(jobs, int) and jobs >= 1, "jobs needs to be a positive integer"
+    if sink is None:
+        sink = FILE_SYSTEM_SINK
+    assert not incremental or sink.writes_to_folders, "incremental mode needs to write into folders"
+    assert not resume or sink.writes_to_folders, "resuming needs to write into folders"
+    assert unsupported in UNSUPPORTED_MODES, f"unsupported needs to be one of {', '.join(UNSUPPORTED_MODES)}"
+    if name_registry is None:
+        name_registry = NameRegistry()
+    # before an own pool starts, forked workers inherit the disabled cache
+    if low_memory:
+        parse_cache.resize(0)
+
+    log_debug = log.isEnabledFor(logging.DEBUG)
     default_attempts = [2,1] # default number of attempts and corresponding points for problems
-    given_chapter_number = True
-    GIVEN_CHAPTER_NUMBER = "3"
 
     # Directory containing the local XML files
-    sequential_directory = 'sequential'
-    vertical_directory = 'vertical'
-    problem_directory = 'problem'
+    # (sequential/ and vertical/ are streamed by iterChapterProblems)
+    problem_directory = os.path.join(course_directory, 'problem')
 
-    # Parse the main XML file
-    tree = ET.parse(chapter_xml_file)
-    chapter = tree.getroot()
+    # Only the attributes of the chapter are needed, its children are streamed below
+    chapter_attrib = readRootAttrib(chapter_xml_file)
 
     # fetch assessment level meta-data
-    assessment_title = chapter.attrib['display_name']
-    assessment_text = chapter.attrib['highlights'].strip('[]').split(', ')
+    assessment_title = chapter_attrib['display_name']
+    assessment_text = chapter_attrib['highlights'].strip('[]').split(', ')
     assessment_text = '. '.join([s.strip('\'"') for s in assessment_text])
 
-    if verbose:
-        print('='*20)
-        print("Chapter: ")
-        print(chapter.attrib['display_name'])
-        print(chapter.attrib['highlights'])
-
     # Search for which chapter we are processing
-    pattern = r'\d{1,2}'
-    chapter_number_str = re.search(pattern, chapter.attrib['display_name']).group()
-    original_chapter_number = chapter_number_str
-    if given_chapter_number:
-        chapter_number_str = GIVEN_CHAPTER_NUMBER
-    # Search for the first match in the input string
-    relative_output_directory = 'c' + original_chapter_number
+    relative_output_directory, original_chapter_number = chapterFolder(chapter_attrib['display_name'], chapter_number)
+    chapter_number_str = original_chapter_number
+    if assessment_number is not None:
+        chapter_number_str = assessment_number
     output_directory = os.path.join(output_base_directory, relative_output_directory)
     # Create output directory
-    os.makedirs(output_directory, exist_ok=True)
+    sink.makedirs(output_directory, exist_ok=True)
     # now output_directory contains chapter number
-    if verbose:
-        print("Output Directory: ", output_directory)
-
-    # initialize zones
+    if plan is not None:
+        plan["output_directory"] = output_directory
+        plan["assessment_title"] = assessment_title
+        plan["assessment_number"] = chapter_number_str
+        plan["problems"] = []
+    problem_types = Counter()
+    if plan is not None:
+        plan["problem_types"] = problem_types
+    log.info("chapter", extra={"fields": {"display_name": chapter_attrib['display_name'],
+                                          "highlights": chapter_attrib['highlights'],
+                                          "output_directory": output_directory}})
+
+    # initialize zones, questions are kept as ids until infoAssessment.json is written
     zones = []
+    assessment_question_ids = set()
+
+    # problems are converted in a process pool when jobs > 1
+    # a pool given by the caller is shared and left open
+    own_executor = executor is None and jobs > 1
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=jobs)
+    pending_conversions = deque()
+    max_pending_conversions = 2 * jobs if low_memory else None
+    num_problems = 0
+
+    # stage timings of converted problems are collected into this process' timer
+    timer = activeTimer()
+    # worker processes only write into folders themselves, other sinks get the files from here
+    capture = executor is not None and not sink.writes_to_folders
+
+    # incremental mode: {output problem path: source hash} of the previous and of this run
+    previous_manifest = loadManifest(output_directory) if incremental else {}
+    # folders of the previous run, the ones this run does not write are removed
+    previous_folders = manifestFolders(output_directory) if incremental else set()
+    manifest = {}
+    num_skipped = 0
+
+    # journal of the converted problems, removed when the chapter is complete
+    chapter_name = os.path.splitext(os.path.basename(chapter_xml_file))[0]
+    journal = None
+    if sink.writes_to_folders:
+        journal = ConversionJournal(journalPath(output_directory, chapter_name), resume=resume)
+    num_resumed = 0
+
+    # current sequential and vertical, they change while streaming problem references
+    seq = None
+    vert = None
+
+    # Loop through problems of the chapter in sequential and vertical order
+    for problem_index, problem_ref in enumerate(iterChapterProblems(chapter_xml_file, course_directory)):
+        if problem_ref.sequential is not seq:
+            seq = problem_ref.sequential
+            seq_name = seq.url_name
+
+            # fetch sequential title as sub topic folder name
+            sub_topic, seq_number = sequentialFolder(seq.attrib['display_name'])
+            if seq_number is not None:
+                sub_topic_number = seq_number
+            sub_topic_directory = os.path.join(output_directory, sub_topic)
+
+            # fetch sequential level meta-data
+            # sequentials are only streamed when they contain problems i.e. not discussion etc.
+            seq_in_zone_dict = dict()
+            seq_in_zone_dict["title"] = seq.attrib['display_name']
+            seq_in_zone_dict["comment"] = f"comment for {seq.attrib['display_name']}"
+            seq_in_zone_dict["questions"] = []
+            zones.append(seq_in_zone_dict)
 
-    # Loop through sequential elements and copy XML files
-    for sequential in chapter.findall('sequential'):
-        seq_name = sequential.get('url_name')
-        seq_path = os.path.join(sequential_directory, f'{seq_name}.xml')
-        seq_tree = ET.parse(seq_path)
-        seq = seq_tree.getroot()
-
-        # fetch sequential title as sub topic folder name
-        sub_topic_number_match = re.search(r'\.(\d{1,2})', seq.attrib['display_name'])
-        if sub_topic_number_match:
-            sub_topic_number = sub_topic_number_match.group(1)
-            sub_topic = 's' + sub_topic_number
-        else:
-            sub_topic = 'prog'
-        sub_topic_directory = os.path.join(output_directory, sub_topic)
-
-        # fetch sequential level meta-data
-        seq_in_zone_dict = dict()
-        seq_in_zone_dict["title"] = seq.attrib['display_name']
-        seq_in_zone_dict["comment"] = f"comment for {seq.attrib['display_name']}"
-        seq_in_zone_dict["questions"] = []
-
-        
-        if verbose:
-            print('-'*20)
-            print("sequential: ", seq.attrib['display_name'])
-            print("seq source url: ", seq_name)
-
-        for vertical in seq.findall('vertical'):
-            vert_name = vertical.get('url_name')
-            vert_path = os.path.join(vertical_directory, f'{vert_name}.xml')
-            vert_tree = ET.parse(vert_path)
-            vert = vert_tree.getroot()
+            if log_debug:
+                log.debug("sequential", extra={"fields": {"display_name": seq.attrib['display_name'], "url_name": seq_name}})
+
+        if problem_ref.vertical is not vert:
+            vert = problem_ref.vertical
+            vert_name = vert.url_name
 
             # fetch vertical level meta-data
             question_title = vert.attrib['display_name']
 
-            if verbose:
-                print("vertical: ", vert.attrib['display_name'])
-                print("source url: ", vert_name)
-
-            for problem in vert.findall('problem'):
-                prob_name = problem.get('url_name')
-                prob_path = os.path.join(problem_directory, f'{prob_name}.xml')
-                prob_tree = ET.parse(prob_path)
-                prob = prob_tree.getroot()
-                if verbose:
-                    print("problem: ", prob.attrib['display_name'])
-                    print("source url: ", prob_name)
-                    for child in prob:
-                        print(child.tag, child.attrib)
-                
-                # create current problem output folder
-                # prob_folder_name = stringToFilename(+ vert.attrib['display_name'][:2] + '-p' + prob.attrib['display_name'][:2])
-                # first_letter_index = find_first_letter_index(seq.attrib['display_name'])
-                # if first_letter_index != -1:
-                #     substring = get_substring_to_first_letter(seq.attrib['display_name'])
-                # else:
-                #     substring = seq.attrib['display_name']
-                # prob_folder_name = stringToFilename( substring + 'p' + prob.attrib['display_name'][:30])
-                prob_folder_name = stringToFilename('p' + prob.attrib['display_name'][:30])
-                # drop # : and ,
-                characters_to_remove = ['#', ':', ',', '(', ')', '\'', '?']
-                for char in characters_to_remove:
-                    prob_folder_name = re.sub(re.escape(char), '', prob_folder_name)
-
-                output_prob_path = os.path.join(sub_topic_directory, prob_folder_name)
-                output_index = 1
-                conflict_flag = False
-                while os.path.exists(output_prob_path):
-                    output_prob_path = f"{output_prob_path}_{output_index}"
-                    output_index += 1
-                    conflict_flag = True
-
-                # drop # : and , ?
-                characters_to_remove = ['#', ':', ',','(', ')', '\'', '?']
-                for char in characters_to_remove:
-                    output_prob_path = re.sub(re.escape(char), '', output_prob_path)
-
-                
-                os.makedirs(output_prob_path, exist_ok=False)
-
-                # convert .xml file into .json .html (and .py for numerical response problems)
-                # sub_question_title = question_title + f": {prob.attrib['display_name']}"
-                # sub_question_title = question_title
-                sub_question_title = prob.attrib['display_name']
-                topic = f"chapter_{original_chapter_number}"
-                tags = [f"section_{sub_topic_number}"]
-                xmlToJson(question_title=sub_question_title, topic=topic, tags=tags, output_base_directory=output_prob_path, source_url=prob_name)
-                xmlToHtml(prob_path=os.path.join(problem_directory, prob_name+'.xml'), output_base_directory=output_prob_path)
-
-                # save problem to zones in infoAssessment.json
-                prob_info_dict = dict()
-                # if conflict_flag:
-                #     prob_info_dict["id"] = relative_output_directory + '/' + prob_folder_name + f'_{output_index}'
-                # else:
-                prob_info_dict["id"] = relative_output_directory  + '/' + sub_topic  + '/' + prob_folder_name 
-
-                prob_info_dict["points"] = default_attempts
-                seq_in_zone_dict['questions'].append(prob_info_dict)
-        
-        # add current sequential meta-data (problems) into zones
-        # add only when current sequential contains problems i.e. not discussion etc.
-        if len(seq_in_zone_dict['questions']) > 0:
-            zones.append(seq_in_zone_dict)
-
-    # write infoAssessment.json after go through all sequentials
-    writeAssessJson(assessment_title=assessment_title, assessment_number=chapter_number_str,
-                    zones=zones, assessment_text=assessment_text, output_base_directory=output_directory)
+            if log_debug:
+                log.debug("vertical", extra={"fields": {"display_name": vert.attrib['display_name'], "url_name": vert_name}})
+
+        prob_name = problem_ref.problem
+        prob_path = os.path.join(problem_directory, f'{prob_name}.xml')
+        with stage(prob_name, "traverse"):
+            problem_type = scanProblemType(prob_path)
+        problem_types[problem_type] += 1
+        if problem_type == UNSUPPORTED and unsupported != "convert":
+            if unsupported == "quarantine":
+                quarantine_directory = os.path.join(output_base_directory, QUARANTINE_DIRECTORY)
+                sink.makedirs(quarantine_directory, exist_ok=True)
+                # the source bytes unchanged, whatever their encoding
+                sink.linkFile(prob_path, os.path.join(quarantine_directory, f'{prob_name}.xml'))
+            log.info("unsupported problem", extra={"fields": {"url_name": prob_name, "mode": unsupported}})
+            continue
+
+        # the tree is parsed here when this process converts the problem too (the parse cache hands
+        # it to xmlToHtml) or the debug event lists its children; a worker process or low memory
+        # mode parses the problem once in the converter, only the root attributes are read here
+        parse_tree = (executor is None or log_debug) and not low_memory
+        with stage(prob_name, "traverse"):
+            if parse_tree:
+                prob_tree = parseXml(prob_path)
+                prob_attrib = prob_tree.getroot().attrib
+            else:
+                prob_attrib = readRootAttrib(prob_path)
+        if log_debug:
+            fields = {"display_name": prob_attrib['display_name'], "url_name": prob_name, "type": problem_type}
+            if parse_tree:
+                fields["children"] = [{"tag": child.tag, "attrib": dict(child.attrib)} for child in prob_tree.getroot()]
+            log.debug("problem", extra={"fields": fields})
+
+        # dedup mode: zones point to the question converted for another assessment
+        if deduplicator is not None:
+            with stage(prob_name, "traverse"):
+                content_hash = normalizedHash(prob_path)
+            converted_question = deduplicator.lookup(content_hash)
+            if converted_question is not None and converted_question[0] not in assessment_question_ids:
+                deduplicator.addDuplicate(content_hash)
+                seq_in_zone_dict['questions'].append(converted_question[0])
+                assessment_question_ids.add(converted_question[0])
+                if log_debug:
+                    log.debug("duplicate", extra={"fields": {"url_name": prob_name, "question": converted_question[0]}})
+                continue
+
+        # create current problem output folder
+        # prob_folder_name = stringToFilename(+ vert.attrib['display_name'][:2] + '-p' + prob.attrib['display_name'][:2])
+        # first_letter_index = find_first_letter_index(seq.attrib['display_name'])
+        # if first_letter_index != -1:
+        #     substring = get_substring_to_first_letter(seq.attrib['display_name'])
+        # else:
+        #     substring = seq.attrib['display_name']
+        # prob_folder_name = stringToFilename( substring + 'p' + prob.attrib['display_name'][:30])
+        # folder names are unique within this run, an existing output folder is overwritten
+        prob_folder_name = name_registry.allocate(sub_topic_directory, problemFolder(prob_attrib['display_name']))
+        output_prob_path = os.path.join(sub_topic_directory, prob_folder_name)
+        question_id = relative_output_directory + '/' + sub_topic + '/' + prob_folder_name
+        with stage(prob_name, "traverse"):
+            sink.makedirs(output_prob_path, exist_ok=True)
+
+        # convert .xml file into .json .html (and .py for numerical response problems)
+        # sub_question_title = question_title + f": {prob.attrib['display_name']}"
+        # sub_question_title = question_title
+        sub_question_title = prob_attrib['display_name']
+        topic = f"chapter_{original_chapter_number}"
+        tags = [f"section_{sub_topic_number}"]
+        convert_kwargs = dict(prob_path=os.path.join(problem_directory, prob_name+'.xml'), prob_name=prob_name,
+                              question_title=sub_question_title, topic=topic, tags=tags, output_prob_path=output_prob_path,
+                              timed=timer is not None, question_id=question_id)
+        num_problems += 1
+        if plan is not None:
+            plan["problems"].append(convert_kwargs)
+
+        # incremental mode: skip problems unchanged since the previous run
+        unchanged = False
+        if incremental:
+            manifest_key = os.path.relpath(output_prob_path, output_directory).replace(os.sep, '/')
+            manifest[manifest_key] = hashProblem(prob_path, prob_name, sub_question_title, topic, tags)
+            # a folder removed since (or only partly written) is converted again
+            unchanged = (previous_manifest.get(manifest_key) == manifest[manifest_key]
+                         and all(os.path.isfile(os.path.join(output_prob_path, filename))
+                                 for filename in convertedFilenames(problem_type)))
+
+        # resumed run: skip problems converted before the interruption
+        if journal is not None and journal.isCompleted(problem_index, prob_name, question_id):
+            num_resumed += 1
+            if log_debug:
+                log.debug("resumed", extra={"fields": {"url_name": prob_name, "output_directory": output_prob_path}})
+        elif unchanged:
+            num_skipped += 1
+            if log_debug:
+                log.debug("unchanged", extra={"fields": {"url_name": prob_name, "output_directory": output_prob_path}})
+        elif executor is not None:
+            future = executor.submit(convertProblem, capture=capture, **convert_kwargs)
+            if journal is not None:
+                journal.recordWhenDone(future, problem_index, prob_name, question_id)
+            pending_conversions.append((prob_name, future))
+            # low memory mode: bound the captured files waiting in finished conversions
+            while max_pending_conversions is not None and len(pending_conversions) > max_pending_conversions:
+                finishConversion(*pending_conversions.popleft(), sink, timer)
+        else:
+            stage_seconds, _ = convertProblem(sink=sink, **convert_kwargs)
+            if timer is not None:
+                timer.add(prob_name, stage_seconds)
+            if journal is not None:
+                journal.recordWhenWritten(sink, problem_index, prob_name, question_id)
+
+        # save problem to zones in infoAssessment.json
+        seq_in_zone_dict['questions'].append(question_id)
+        if deduplicator is not None:
+            deduplicator.register(content_hash, question_id, output_prob_path)
+            assessment_question_ids.add(question_id)
+
+        if memory_tracker is not None:
+            memory_tracker.check(prob_path)
+
+    def finishChapter():
+        """
+        Wait for the conversions of the chapter and write its infoAssessment.json
+        """
+        # wait for the process pool, re-raise the first failed conversion
+        while pending_conversions:
+            finishConversion(*pending_conversions.popleft(), sink, timer)
+        if own_executor:
+            executor.shutdown()
+
+        for seq_in_zone_dict in zones:
+            seq_in_zone_dict['questions'] = [{"id": prob_id, "points": default_attempts}
+                                             for prob_id in seq_in_zone_dict['questions']]
+
+        # write infoAssessment.json after go through all sequentials
+        # (a sequential whose problems were all skipped has no zone)
+        writeAssessJson(assessment_title=assessment_title, assessment_number=chapter_number_str,
+                        zones=[zone for zone in zones if zone['questions']], assessment_text=assessment_text,
+                        output_base_directory=output_directory, source_url=chapter_name, sink=sink)
+
+        # wait for queued writes (see backgroundWriter), fails on the first failed write
+        sink.flush()
+
+        # the manifest is written last, an interrupted run converts its problems again
+        if incremental:
+            removed_folders = removeStaleFolders(output_directory, previous_folders, manifest)
+            saveManifest(output_directory, manifest)
+            log.info("incremental", extra={"fields": {"output_directory": output_directory, "unchanged": num_skipped,
+                                                      "problems": num_problems, "removed": removed_folders}})
+
+        # the chapter is complete, nothing to resume
+        if journal is not None:
+            journal.close(remove=True)
+            if resume:
+                log.info("resumed chapter", extra={"fields": {"output_directory": output_directory, "resumed": num_resumed,
+                                                              "problems": num_problems}})
+
+    if deferred_chapters is not None:
+        deferred_chapters.append(finishChapter)
+    else:
+        finishChapter()
+    return num_problems
 
 
 
@@ -231,6 +481,6 @@ if __name__ == "__main__":
 
     output_base_directory = 'converter\output'
 
-    sys.stdout = open('converter/output/terminal_output.txt', 'w')
+    configureLogging("debug", 'converter/output/terminal_output.jsonl')
     fetchProblemFromChapter(chapter_xml_file, output_base_directory)
     
@@ -0,0 +1,8 @@
+
+def generate(data):
+
+    data["correct_answers"]["ans_1"] = 71.234
+
+    data["correct_answers"]["ans_2"] = 83.980
+
+    data["correct_answers"]["ans_3"] = 18.259
@@ -0,0 +1,8 @@
+
+def generate(data):
+
+    data["correct_answers"]["ans_1"] = 74.729
+
+    data["correct_answers"]["ans_2"] = 20.275
+
+    data["correct_answers"]["ans_3"] = 20.516
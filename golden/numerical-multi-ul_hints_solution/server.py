@@ -0,0 +1,8 @@
+
+def generate(data):
+
+    data["correct_answers"]["ans_1"] = 53.908
+
+    data["correct_answers"]["ans_2"] = 28.920
+
+    data["correct_answers"]["ans_3"] = 3.004
@@ -0,0 +1,8 @@
+
+def generate(data):
+
+    data["correct_answers"]["ans_1"] = 37.696
+
+    data["correct_answers"]["ans_2"] = 92.679
+
+    data["correct_answers"]["ans_3"] = 84.345
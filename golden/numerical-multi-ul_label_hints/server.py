@@ -0,0 +1,8 @@
+
+def generate(data):
+
+    data["correct_answers"]["ans_1"] = 64.850
+
+    data["correct_answers"]["ans_2"] = 70.137
+
+    data["correct_answers"]["ans_3"] = 95.705
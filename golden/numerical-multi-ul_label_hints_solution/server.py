@@ -0,0 +1,8 @@
+
+def generate(data):
+
+    data["correct_answers"]["ans_1"] = 1.228
+
+    data["correct_answers"]["ans_2"] = 11.240
+
+    data["correct_answers"]["ans_3"] = 39.284
@@ -0,0 +1,8 @@
+
+def generate(data):
+
+    data["correct_answers"]["ans_1"] = 54.812
+
+    data["correct_answers"]["ans_2"] = 34.583
+
+    data["correct_answers"]["ans_3"] = 84.485
@@ -0,0 +1,8 @@
+
+def generate(data):
+
+    data["correct_answers"]["ans_1"] = 11.296
+
+    data["correct_answers"]["ans_2"] = 13.085
+
+    data["correct_answers"]["ans_3"] = 59.726
@@ -0,0 +1,8 @@
+
+def generate(data):
+
+    data["correct_answers"]["ans_1"] = 7.742
+
+    data["correct_answers"]["ans_2"] = 21.362
+
+    data["correct_answers"]["ans_3"] = 30.313
@@ -0,0 +1,8 @@
+
+def generate(data):
+
+    data["correct_answers"]["ans_1"] = 52.894
+
+    data["correct_answers"]["ans_2"] = 58.575
+
+    data["correct_answers"]["ans_3"] = 84.333
@@ -0,0 +1,8 @@
+
+def generate(data):
+
+    data["correct_answers"]["ans_1"] = 63.947
+
+    data["correct_answers"]["ans_2"] = 42.902
+
+    data["correct_answers"]["ans_3"] = 72.430
@@ -0,0 +1,8 @@
+
+def generate(data):
+
+    data["correct_answers"]["ans_1"] = 57.033
+
+    data["correct_answers"]["ans_2"] = 63.223
+
+    data["correct_answers"]["ans_3"] = 81.700
@@ -0,0 +1,8 @@
+
+def generate(data):
+
+    data["correct_answers"]["ans_1"] = 54.869
+
+    data["correct_answers"]["ans_2"] = 75.054
+
+    data["correct_answers"]["ans_3"] = 74.731
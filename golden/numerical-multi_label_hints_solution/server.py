@@ -0,0 +1,8 @@
+
+def generate(data):
+
+    data["correct_answers"]["ans_1"] = 20.985
+
+    data["correct_answers"]["ans_2"] = 38.540
+
+    data["correct_answers"]["ans_3"] = 19.506
@@ -0,0 +1,8 @@
+
+def generate(data):
+
+    data["correct_answers"]["ans_1"] = 68.200
+
+    data["correct_answers"]["ans_2"] = 9.160
+
+    data["correct_answers"]["ans_3"] = 61.782
@@ -0,0 +1,8 @@
+
+def generate(data):
+
+    data["correct_answers"]["ans_1"] = 32.870
+
+    data["correct_answers"]["ans_2"] = 98.321
+
+    data["correct_answers"]["ans_3"] = 95.925
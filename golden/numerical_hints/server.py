@@ -0,0 +1,4 @@
+
+def generate(data):
+
+    data["correct_answers"]["ans"] = 18.126
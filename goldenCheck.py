@@ -0,0 +1,105 @@
+import os, sys, random, argparse
+import xmlBackend
+from problemIR import extractProblem
+from xmlToHtml import renderProblemFiles
+from syntheticCourse import generateProblem, PROBLEM_KINDS
+
+# one folder per case: the problem .xml and the question.html (and server.py) it converts to
+GOLDEN_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+PROBLEM_FILENAME = "problem.xml"
+# parts generateProblem() can leave out, every combination is a case
+OPTIONAL_PARTS = ("label", "hints", "solution")
+
+
+def goldenCases():
+    """
+    (case name, problem .xml) of every PROBLEM_KINDS with and without label, hints and solution,
+    "checkbox_label_solution" has a label and a solution but no hints
+    """
+    for kind_index, kind in enumerate(PROBLEM_KINDS):
+        for combination in range(2 ** len(OPTIONAL_PARTS)):
+            parts = [part for idx, part in enumerate(OPTIONAL_PARTS) if combination >> idx & 1]
+            case_name = "_".join([kind] + parts)
+            rng = random.Random(kind_index * 2 ** len(OPTIONAL_PARTS) + combination)
+            yield case_name, generateProblem(kind, f"Golden {case_name}", rng, with_label="label" in parts,
+                                             with_hints="hints" in parts, with_solution="solution" in parts)
+
+
+def renderCase(prob_path: str):
+    """
+    {filename: content} the converter renders from a problem .xml with the current xml backend
+    """
+    return renderProblemFiles(extractProblem(xmlBackend.backend.parse(prob_path).getroot()))
+
+
+def _readText(path: str):
+    with open(path, "r", encoding="utf-8", newline="") as text_file:
+        return text_file.read()
+
+
+def _writeText(path: str, content: str):
+    with open(path, "w", encoding="utf-8", newline="") as text_file:
+        text_file.write(content)
+
+
+def writeGolden(golden_directory: str = GOLDEN_DIRECTORY):
+    """
+    Regenerate every case and store what the converter renders now as the expected output,
+    only after checking that the change of the output is intended
+    """
+    for case_name, problem_xml in goldenCases():
+        case_directory = os.path.join(golden_directory, case_name)
+        os.makedirs(case_directory, exist_ok=True)
+        for filename in os.listdir(case_directory):
+            os.remove(os.path.join(case_directory, filename))
+        prob_path = os.path.join(case_directory, PROBLEM_FILENAME)
+        _writeText(prob_path, problem_xml)
+        for filename, content in renderCase(prob_path).items():
+            _writeText(os.path.join(case_directory, filename), content)
+
+
+def checkGolden(golden_directory: str = GOLDEN_DIRECTORY, backends: list = None):
+    """
+    Render the problem of every case folder and compare it with the expected files next to it
+
+    :param : backends: xml backends to render with (see xmlBackend), defaults to every installed one
+    :return: list of str, one error per differing or missing file
+    """
+    if backends is None:
+        backends = xmlBackend.availableBackends()
+    errors = []
+    previous_backend = xmlBackend.backend.name
+    try:
+        for name in backends:
+            xmlBackend.setBackend(name)
+            for case_name in sorted(os.listdir(golden_directory)):
+                case_directory = os.path.join(golden_directory, case_name)
+                expected_filenames = set(os.listdir(case_directory)) - {PROBLEM_FILENAME}
+                rendered_files = renderCase(os.path.join(case_directory, PROBLEM_FILENAME))
+                for filename in sorted(expected_filenames | set(rendered_files)):
+                    if filename not in rendered_files:
+                        errors.append(f"{name}: {case_name}/{filename} is not rendered")
+                    elif filename not in expected_filenames:
+                        errors.append(f"{name}: {case_name}/{filename} is rendered but not expected")
+                    elif rendered_files[filename] != _readText(os.path.join(case_directory, filename)):
+                        errors.append(f"{name}: {case_name}/{filename} differs")
+    finally:
+        xmlBackend.setBackend(previous_backend)
+    return errors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the rendered question.html and server.py of synthetic problems "
+                                                 "with their golden copies")
+    parser.add_argument('--golden', default=GOLDEN_DIRECTORY, help="folder of the golden cases")
+    parser.add_argument('--update', action='store_true',
+                        help="regenerate the cases and store the current output as golden")
+    args = parser.parse_args()
+
+    if args.update:
+        writeGolden(args.golden)
+    errors = checkGolden(args.golden)
+    for error in errors:
+        print(error, file=sys.stderr)
+    print(f"checked {len(os.listdir(args.golden))} cases, {len(errors)} differences", file=sys.stderr)
+    sys.exit(1 if errors else 0)
@@ -0,0 +1,117 @@
+import os
+import json
+import shutil
+import uuid
+import hashlib
+import olxSource
+
+MANIFEST_FILENAME = ".convert_manifest.json"
+
+# namespace of the uuids derived from edX url_names, never change it:
+# PrairieLearn identifies questions and assessments by these uuids
+OLX_UUID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "https://github.com/Stratocumulus/XML_To_Html_Converter")
+
+# modules whose code decides the content of the outputs
+CONVERTER_MODULES = ["xmlToHtml.py", "xmlToJson.py", "writeAssessJson.py", "staticAssets.py", "problemIR.py", "templates.py"]
+
+
+def stableUuid(url_name: str):
+    """
+    UUID (Version 5) derived from an edX url_name, identical on every run
+    """
+    assert isinstance(url_name, str)
+    return uuid.uuid5(OLX_UUID_NAMESPACE, url_name)
+
+
+def writeIfChanged(path: str, content: str):
+    """
+    Write content into path unless the file already holds exactly that content
+
+    :return: bool, True when the file was written
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as old_file:
+            if old_file.read() == content:
+                return False
+    except (FileNotFoundError, UnicodeDecodeError):
+        pass
+
+    with open(path, "w", encoding="utf-8") as new_file:
+        new_file.write(content)
+    return True
+
+
+def converterHash():
+    """
+    Hash of the converter source, a changed converter invalidates every manifest
+    """
+    sha = hashlib.sha256()
+    module_directory = os.path.dirname(os.path.abspath(__file__))
+    for module in CONVERTER_MODULES:
+        with open(os.path.join(module_directory, module), "rb") as module_file:
+            sha.update(module_file.read())
+    return sha.hexdigest()
+
+
+def hashProblem(prob_path: str, *metadata):
+    """
+    Hash of a problem source file and the metadata it is converted with
+    (title, topic, tags, ...), metadata needs to be json serializable
+    """
+    sha = hashlib.sha256()
+    sha.update(olxSource.readBytes(prob_path))
+    sha.update(json.dumps(metadata).encode("utf-8"))
+    return sha.hexdigest()
+
+
+def loadManifest(output_directory: str):
+    """
+    Load the {output problem path: source hash} manifest of a chapter output folder,
+    empty when missing or written by a different converter
+    """
+    manifest = _readManifest(output_directory)
+    if manifest.get("converter") != converterHash():
+        return {}
+    return manifest.get("problems", {})
+
+
+def _readManifest(output_directory: str):
+    try:
+        with open(os.path.join(output_directory, MANIFEST_FILENAME), "r", encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def manifestFolders(output_directory: str):
+    """
+    Output problem paths listed in the manifest of a chapter output folder,
+    also when it was written by a different converter
+    """
+    return set(_readManifest(output_directory).get("problems", {}))
+
+
+def removeStaleFolders(output_directory: str, previous_folders: set, current_folders: set):
+    """
+    Remove the problem folders a previous run wrote that this run does not produce
+    (renamed, moved or removed problems), they would keep their question uuids
+
+    :return: sorted list of the removed output problem paths
+    """
+    removed = []
+    for folder in sorted(set(previous_folders) - set(current_folders)):
+        folder_path = os.path.normpath(os.path.join(output_directory, folder))
+        # only folders below output_directory, the manifest is a file anyone can edit
+        relative_path = os.path.relpath(folder_path, output_directory)
+        if relative_path == os.curdir or relative_path.split(os.sep)[0] == os.pardir:
+            continue
+        if os.path.isdir(folder_path):
+            shutil.rmtree(folder_path)
+            removed.append(folder)
+    return removed
+
+
+def saveManifest(output_directory: str, problems: dict):
+    manifest = {"converter": converterHash(), "problems": problems}
+    writeIfChanged(os.path.join(output_directory, MANIFEST_FILENAME), json.dumps(manifest, indent=2, sort_keys=True))
@@ -0,0 +1,60 @@
+import os
+import sys
+
+try:
+    import resource
+except ImportError: # not available on Windows
+    resource = None
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def currentRss():
+    """
+    Resident set size of this process in bytes, from /proc/self/statm on Linux,
+    elsewhere the peak reported by getrusage (0 when neither is available)
+    """
+    try:
+        with open("/proc/self/statm", "rb") as statm_file:
+            return int(statm_file.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        pass
+    if resource is None:
+        return 0
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, KiB on Linux and BSD
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class MemoryTracker:
+    """
+    Peak RSS of this process between reset() calls, sampled by check(),
+    which fails as soon as a sample is above the limit
+
+    Worker processes (jobs > 1) are not included, their memory is bounded
+    by the size of the problem they convert
+    """
+    def __init__(self, limit_bytes: int = None):
+        assert limit_bytes is None or (isinstance(limit_bytes, int) and limit_bytes > 0), \
+            "limit_bytes needs to be a positive integer"
+        self.limit_bytes = limit_bytes
+        self.peak_bytes = 0
+
+    def reset(self):
+        self.peak_bytes = currentRss()
+        return self.peak_bytes
+
+    def check(self, context: str = ''):
+        """
+        Sample the RSS, raises MemoryError above limit_bytes
+
+        :param : context: str, what is being converted, for the error message
+        """
+        rss = currentRss()
+        if rss > self.peak_bytes:
+            self.peak_bytes = rss
+        if self.limit_bytes is not None and rss > self.limit_bytes:
+            raise MemoryError(f"memory limit exceeded while converting {context}: "
+                              f"RSS {rss / 2**20:.1f} MiB > limit {self.limit_bytes / 2**20:.1f} MiB, "
+                              f"lower --cache-size / --jobs or raise --max-memory-mb")
+        return rss
@@ -0,0 +1,49 @@
+import os
+
+# one translation for folder names: spaces, hyphens and dots become '_',
+# '_' and # : , ( ) ' ? are dropped
+FOLDER_NAME_TRANSLATION = str.maketrans(" -.", "___", "_#:,()'?")
+
+
+def sanitizeFolderName(name: str):
+    """
+    Folder name from a display name, see FOLDER_NAME_TRANSLATION
+    """
+    sanitized_name = name.translate(FOLDER_NAME_TRANSLATION)
+    if not sanitized_name:
+        sanitized_name = "default_filename"
+    return sanitized_name
+
+
+class NameRegistry:
+    """
+    Unique, sanitized folder names per output directory, resolved in memory
+
+    Conflicting names get a _1, _2, ... suffix in allocation order,
+    the disk is never consulted, so the same traversal always gets the same names
+    """
+    def __init__(self):
+        self._taken = dict()        # {directory: set of folder names}
+        self._next_suffix = dict()  # {(directory, sanitized name): next suffix to try}
+
+    def allocate(self, directory: str, name: str):
+        """
+        :param : directory: str, output directory the folder is created in
+        :param : name: str, wanted folder name, sanitized here
+        :return: str, unique folder name within directory
+        """
+        directory = os.path.normpath(directory)
+        base_name = sanitizeFolderName(name)
+        taken = self._taken.setdefault(directory, set())
+
+        folder_name = base_name
+        if folder_name in taken:
+            suffix = self._next_suffix.get((directory, base_name), 1)
+            folder_name = f"{base_name}_{suffix}"
+            while folder_name in taken:
+                suffix += 1
+                folder_name = f"{base_name}_{suffix}"
+            self._next_suffix[(directory, base_name)] = suffix + 1
+
+        taken.add(folder_name)
+        return folder_name
@@ -0,0 +1,287 @@
+import os, sys, time, sqlite3, argparse
+from fetchCourse import findChapters, assignChapterNumbers
+from fetchProblemFromChapter import chapterFolder, sequentialFolder, problemFolder
+from olxStream import readRootAttrib, iterChapterProblems
+from nameRegistry import NameRegistry
+from problemScan import scanProblemType, PROBLEM_TYPES
+from problemDedup import normalizedHash
+import olxSource
+
+CATALOG_FILENAME = "olxCatalog.sqlite"
+# bump when the tables or the way their rows are computed change, an older catalog is rebuilt without reusing its rows
+CATALOG_VERSION = "3"
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE chapters (
+    id INTEGER PRIMARY KEY, url_name TEXT, position INTEGER, display_name TEXT, number TEXT,
+    output_directory TEXT
+);
+CREATE TABLE sequentials (
+    id INTEGER PRIMARY KEY, chapter_id INTEGER REFERENCES chapters(id), url_name TEXT, position INTEGER,
+    display_name TEXT, output_directory TEXT
+);
+CREATE TABLE verticals (
+    id INTEGER PRIMARY KEY, sequential_id INTEGER REFERENCES sequentials(id), url_name TEXT, position INTEGER,
+    display_name TEXT
+);
+CREATE TABLE problem_files (
+    url_name TEXT PRIMARY KEY, display_name TEXT, problem_type TEXT, content_hash TEXT, mtime_ns INTEGER
+);
+CREATE TABLE problems (
+    id INTEGER PRIMARY KEY, vertical_id INTEGER REFERENCES verticals(id), url_name TEXT, position INTEGER,
+    question_id TEXT
+);
+CREATE INDEX problems_url_name ON problems (url_name);
+CREATE INDEX problems_vertical ON problems (vertical_id);
+CREATE INDEX problem_files_type ON problem_files (problem_type);
+CREATE INDEX problem_files_hash ON problem_files (content_hash);
+"""
+
+# one row per problem placement with its chapter, sequential and vertical
+PLACEMENT_QUERY = """
+SELECT p.url_name, f.display_name, f.problem_type, p.question_id,
+       c.url_name, s.url_name, v.url_name, v.display_name
+FROM problems p
+JOIN problem_files f ON f.url_name = p.url_name
+JOIN verticals v ON v.id = p.vertical_id
+JOIN sequentials s ON s.id = v.sequential_id
+JOIN chapters c ON c.id = s.chapter_id
+"""
+PLACEMENT_COLUMNS = ("url_name", "display_name", "type", "question_id", "chapter", "sequential", "vertical",
+                     "vertical_display_name")
+
+
+def loadProblemFiles(catalog_path: str):
+    """
+    {problem url_name: (mtime_ns, display_name, problem_type, content_hash)} of an existing catalog,
+    reused for the problems whose file did not change
+    """
+    if not os.path.isfile(catalog_path):
+        return {}
+    try:
+        with sqlite3.connect(catalog_path) as connection:
+            version = connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            if version is None or version[0] != CATALOG_VERSION:
+                return {}
+            rows = connection.execute("SELECT url_name, mtime_ns, display_name, problem_type, content_hash "
+                                      "FROM problem_files").fetchall()
+    except sqlite3.DatabaseError:
+        return {}
+    return {url_name: (mtime_ns, display_name, problem_type, content_hash)
+            for url_name, mtime_ns, display_name, problem_type, content_hash in rows}
+
+
+def buildCatalog(course_directory: str, catalog_path: str = CATALOG_FILENAME):
+    """
+    Index an OLX export into a SQLite catalog in one streaming pass:
+    chapters, sequentials and verticals holding problems, every problem placement
+    with the question id (output folder relative to the output base directory)
+    fetchCourse gives it with its default options, and per problem file its
+    display name, type (see problemScan) and normalized content hash (see problemDedup)
+
+    Problems whose file has the same mtime as in the previous catalog are not read again.
+    The catalog is written next to catalog_path and moved over it when complete
+
+    :param : course_directory: str, (relative) path to the OLX export folder or .tar.gz archive
+    :param : catalog_path: str, the SQLite file
+    :return: dict with the number of chapters, problems, problem files and reused problem files
+    """
+    assert isinstance(course_directory, str)
+    assert isinstance(catalog_path, str)
+
+    previous_files = loadProblemFiles(catalog_path)
+    temporary_path = catalog_path + ".tmp"
+    if os.path.exists(temporary_path):
+        os.remove(temporary_path)
+
+    connection = sqlite3.connect(temporary_path)
+    # a half written catalog is never used, no journal needed
+    connection.execute("PRAGMA journal_mode = OFF")
+    connection.execute("PRAGMA synchronous = OFF")
+    connection.executescript(SCHEMA)
+
+    chapter_directory = os.path.join(course_directory, 'chapter')
+    problem_directory = os.path.join(course_directory, 'problem')
+    # chapters are numbered and problem folders named like fetchCourse does
+    name_registry = NameRegistry()
+    problem_files = dict()
+    num_reused = 0
+    num_problems = 0
+    chapters = findChapters(course_directory)
+    chapter_numbers = assignChapterNumbers(course_directory, chapters)
+
+    with connection:
+        for chapter_position, chapter_name in enumerate(chapters):
+            chapter_path = os.path.join(chapter_directory, f'{chapter_name}.xml')
+            chapter_display_name = readRootAttrib(chapter_path).get('display_name', '')
+            chapter_output_directory = chapterFolder(chapter_display_name, chapter_numbers[chapter_name])[0]
+            chapter_id = connection.execute(
+                "INSERT INTO chapters (url_name, position, display_name, number, output_directory) VALUES (?, ?, ?, ?, ?)",
+                (chapter_name, chapter_position, chapter_display_name, chapter_numbers[chapter_name],
+                 chapter_output_directory)).lastrowid
+
+            seq = None
+            vert = None
+            seq_position = -1
+            for problem_ref in iterChapterProblems(chapter_path, course_directory):
+                if problem_ref.sequential is not seq:
+                    seq = problem_ref.sequential
+                    seq_position += 1
+                    vert_position = -1
+                    sub_topic_directory = chapter_output_directory + '/' + sequentialFolder(seq.attrib.get('display_name', ''))[0]
+                    seq_id = connection.execute(
+                        "INSERT INTO sequentials (chapter_id, url_name, position, display_name, output_directory) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (chapter_id, seq.url_name, seq_position, seq.attrib.get('display_name'), sub_topic_directory)).lastrowid
+
+                if problem_ref.vertical is not vert:
+                    vert = problem_ref.vertical
+                    vert_position += 1
+                    prob_position = -1
+                    vert_id = connection.execute(
+                        "INSERT INTO verticals (sequential_id, url_name, position, display_name) VALUES (?, ?, ?, ?)",
+                        (seq_id, vert.url_name, vert_position, vert.attrib.get('display_name'))).lastrowid
+
+                prob_name = problem_ref.problem
+                if prob_name not in problem_files:
+                    prob_path = os.path.join(problem_directory, f'{prob_name}.xml')
+                    mtime_ns = olxSource.getMtime(prob_path)
+                    previous = previous_files.get(prob_name)
+                    if previous is not None and previous[0] == mtime_ns:
+                        num_reused += 1
+                        problem_files[prob_name] = previous
+                    else:
+                        problem_files[prob_name] = (mtime_ns, readRootAttrib(prob_path).get('display_name', ''),
+                                                    scanProblemType(prob_path), normalizedHash(prob_path))
+
+                prob_position += 1
+                num_problems += 1
+                question_id = sub_topic_directory + '/' + name_registry.allocate(
+                    sub_topic_directory, problemFolder(problem_files[prob_name][1]))
+                connection.execute(
+                    "INSERT INTO problems (vertical_id, url_name, position, question_id) VALUES (?, ?, ?, ?)",
+                    (vert_id, prob_name, prob_position, question_id))
+
+        connection.executemany(
+            "INSERT INTO problem_files (url_name, mtime_ns, display_name, problem_type, content_hash) VALUES (?, ?, ?, ?, ?)",
+            [(prob_name, *row) for prob_name, row in problem_files.items()])
+        connection.executemany("INSERT INTO meta (key, value) VALUES (?, ?)",
+                               [("version", CATALOG_VERSION), ("course_directory", os.path.abspath(course_directory)),
+                                ("built", time.strftime("%Y-%m-%dT%H:%M:%S"))])
+    connection.close()
+    os.replace(temporary_path, catalog_path)
+
+    return {"chapters": len(chapters), "problems": num_problems, "problem_files": len(problem_files),
+            "reused": num_reused}
+
+
+def openCatalog(catalog_path: str = CATALOG_FILENAME):
+    assert os.path.isfile(catalog_path), f"{catalog_path} does not exist, build it first"
+    return sqlite3.connect(f"file:{catalog_path}?mode=ro", uri=True)
+
+
+def problemsOfType(connection, problem_type: str):
+    """
+    Placements of the problems of one type (see problemScan.PROBLEM_TYPES), in course order
+    """
+    return connection.execute(PLACEMENT_QUERY + "WHERE f.problem_type = ? ORDER BY p.id", (problem_type,)).fetchall()
+
+
+def locateProblem(connection, url_name: str):
+    """
+    Every placement of a problem url_name, with the question id it is converted into
+    """
+    return connection.execute(PLACEMENT_QUERY + "WHERE p.url_name = ? ORDER BY p.id", (url_name,)).fetchall()
+
+
+def chapterProblems(connection, chapter_name: str):
+    """
+    Placements of the problems of a chapter in conversion order
+    """
+    return connection.execute(PLACEMENT_QUERY + "WHERE c.url_name = ? ORDER BY p.id", (chapter_name,)).fetchall()
+
+
+def multiProblemVerticals(connection, min_problems: int = 2):
+    """
+    :return: list of (vertical url_name, display_name, chapter url_name, sequential url_name, number of problems)
+    """
+    return connection.execute(
+        "SELECT v.url_name, v.display_name, c.url_name, s.url_name, COUNT(p.id) AS num_problems "
+        "FROM verticals v JOIN problems p ON p.vertical_id = v.id "
+        "JOIN sequentials s ON s.id = v.sequential_id JOIN chapters c ON c.id = s.chapter_id "
+        "GROUP BY v.id HAVING num_problems >= ? ORDER BY v.id", (min_problems,)).fetchall()
+
+
+def typeCounts(connection):
+    """
+    {problem type: number of placements}
+    """
+    return dict(connection.execute(
+        "SELECT f.problem_type, COUNT(*) FROM problems p JOIN problem_files f ON f.url_name = p.url_name "
+        "GROUP BY f.problem_type ORDER BY f.problem_type").fetchall())
+
+
+def duplicateProblems(connection):
+    """
+    :return: list of (content hash, comma separated problem url_names) of problem files with the same content
+    """
+    return connection.execute(
+        "SELECT content_hash, GROUP_CONCAT(url_name, ',') FROM problem_files "
+        "GROUP BY content_hash HAVING COUNT(*) > 1 ORDER BY content_hash").fetchall()
+
+
+def printRows(rows, columns: tuple = None, file=sys.stdout):
+    if columns is not None:
+        print("\t".join(columns), file=file)
+    for row in rows:
+        print("\t".join('' if value is None else str(value) for value in row), file=file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index an OLX export into a SQLite catalog and query it")
+    parser.add_argument('--catalog', default=CATALOG_FILENAME, help="the SQLite catalog file")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build_parser = commands.add_parser('build', help="index an OLX export, unchanged problem files are not read again")
+    build_parser.add_argument('course_directory', help="OLX export folder or .tar.gz archive containing course.xml")
+    commands.add_parser('types', help="number of problems per type")
+    type_parser = commands.add_parser('type', help="problems of one type")
+    type_parser.add_argument('problem_type', choices=PROBLEM_TYPES)
+    verticals_parser = commands.add_parser('verticals', help="verticals holding several problems")
+    verticals_parser.add_argument('--min-problems', type=int, default=2)
+    where_parser = commands.add_parser('where', help="where a problem url_name is placed and converted into")
+    where_parser.add_argument('url_name')
+    chapter_parser = commands.add_parser('chapter', help="problems of a chapter in conversion order")
+    chapter_parser.add_argument('url_name')
+    commands.add_parser('duplicates', help="problem files with the same normalized content")
+    sql_parser = commands.add_parser('sql', help="run a read-only SQL query")
+    sql_parser.add_argument('query')
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    if args.command == 'build':
+        stats = buildCatalog(args.course_directory, args.catalog)
+        print(f"catalog {args.catalog}: {stats['chapters']} chapters, {stats['problems']} problems, "
+              f"{stats['problem_files']} problem files ({stats['reused']} unchanged) "
+              f"in {time.perf_counter() - start_time:.2f}s", file=sys.stderr)
+        sys.exit(0)
+
+    connection = openCatalog(args.catalog)
+    if args.command == 'types':
+        printRows(typeCounts(connection).items(), ("type", "problems"))
+    elif args.command == 'type':
+        printRows(problemsOfType(connection, args.problem_type), PLACEMENT_COLUMNS)
+    elif args.command == 'verticals':
+        printRows(multiProblemVerticals(connection, args.min_problems),
+                  ("vertical", "display_name", "chapter", "sequential", "problems"))
+    elif args.command == 'where':
+        printRows(locateProblem(connection, args.url_name), PLACEMENT_COLUMNS)
+    elif args.command == 'chapter':
+        printRows(chapterProblems(connection, args.url_name), PLACEMENT_COLUMNS)
+    elif args.command == 'duplicates':
+        printRows(duplicateProblems(connection), ("content_hash", "problems"))
+    elif args.command == 'sql':
+        cursor = connection.execute(args.query)
+        printRows(cursor.fetchall(), tuple(column[0] for column in cursor.description or ()))
+    connection.close()
+    print(f"{1000 * (time.perf_counter() - start_time):.1f} ms", file=sys.stderr)
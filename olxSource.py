@@ -0,0 +1,160 @@
+import io
+import os
+import gzip
+import mmap
+import contextlib
+import shutil
+import tarfile
+import tempfile
+
+# an OLX export is read either from a folder or from one of these archives,
+# paths inside an archive are written as if it was a folder: export.tar.gz/problem/<url_name>.xml
+ARCHIVE_SUFFIXES = (".tar.gz", ".tgz", ".tar")
+
+
+class TarArchive:
+    """
+    Random access to the members of a .tar or .tar.gz OLX export
+
+    A .tar.gz is decompressed once into a single unlinked temporary file,
+    then every member is read at its offset from the index built on open
+    """
+    def __init__(self, archive_path: str):
+        self.archive_path = archive_path
+        if archive_path.endswith(".tar"):
+            self._file = open(archive_path, "rb")
+        else:
+            self._file = tempfile.TemporaryFile()
+            with gzip.open(archive_path, "rb") as gz_file:
+                shutil.copyfileobj(gz_file, self._file, 1024 * 1024)
+        self._file.flush()
+
+        # {member name: (offset, size, mtime in ns)}
+        self.index = dict()
+        self._file.seek(0)
+        with tarfile.open(fileobj=self._file, mode="r:") as tar:
+            for member in tar:
+                if member.isfile():
+                    name = os.path.normpath(member.name).replace(os.sep, "/")
+                    self.index[name] = (member.offset_data, member.size, int(member.mtime * 1e9))
+
+        # edX exports keep everything inside one top level folder (course/course.xml)
+        if "course.xml" not in self.index:
+            top_levels = {name.split("/", 1)[0] for name in self.index}
+            if len(top_levels) == 1:
+                prefix = top_levels.pop() + "/"
+                self.index = {name[len(prefix):]: entry for name, entry in self.index.items() if name.startswith(prefix)}
+
+    def _entry(self, member: str):
+        try:
+            return self.index[member]
+        except KeyError:
+            raise FileNotFoundError(f"{member} not found in {self.archive_path}") from None
+
+    def read(self, member: str):
+        offset, size, _ = self._entry(member)
+        # pread does not move the shared file offset, safe in forked worker processes
+        return os.pread(self._file.fileno(), size, offset)
+
+    def mtime(self, member: str):
+        return self._entry(member)[2]
+
+    def exists(self, member: str):
+        return member in self.index
+
+    def close(self):
+        self._file.close()
+
+
+# archives opened by this process, {archive path: TarArchive}
+_archives = dict()
+
+def _splitArchivePath(path: str):
+    """
+    Split export.tar.gz/problem/x.xml into (TarArchive, "problem/x.xml"),
+    (None, path) for an ordinary file
+    """
+    if ".tar" not in path and ".tgz" not in path:
+        return None, path
+
+    parts = os.path.normpath(path).split(os.sep)
+    for idx in range(1, len(parts)):
+        archive_path = os.sep.join(parts[:idx])
+        if archive_path.endswith(ARCHIVE_SUFFIXES) and (archive_path in _archives or os.path.isfile(archive_path)):
+            return openArchive(archive_path), "/".join(parts[idx:])
+    return None, path
+
+
+def openArchive(archive_path: str):
+    """
+    Open (once per process) and index an archived OLX export
+    """
+    archive = _archives.get(archive_path)
+    if archive is None:
+        archive = _archives[archive_path] = TarArchive(archive_path)
+    return archive
+
+
+def isArchive(path: str):
+    return os.path.isfile(path) and path.endswith(ARCHIVE_SUFFIXES)
+
+
+def inArchive(path: str):
+    """
+    True for a file inside an archived export, export.tar.gz/problem/x.xml
+    """
+    return _splitArchivePath(path)[0] is not None
+
+
+def readBytes(path: str):
+    archive, member = _splitArchivePath(path)
+    if archive is not None:
+        return archive.read(member)
+    with open(path, "rb") as olx_file:
+        return olx_file.read()
+
+
+@contextlib.contextmanager
+def mapBytes(path: str):
+    """
+    Read-only buffer of an OLX file without copying it into Python objects:
+    a memory map for a file in a folder, the member bytes for an archive
+    """
+    archive, member = _splitArchivePath(path)
+    if archive is not None:
+        yield archive.read(member)
+        return
+    with open(path, "rb") as olx_file:
+        # an empty file cannot be mapped
+        if os.fstat(olx_file.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(olx_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+            yield mapped_file
+
+
+def openBinary(path: str):
+    """
+    Binary file object of an OLX file in a folder or in an archive
+    """
+    archive, member = _splitArchivePath(path)
+    if archive is not None:
+        return io.BytesIO(archive.read(member))
+    return open(path, "rb")
+
+
+def getMtime(path: str):
+    """
+    Modification time in ns of an OLX file in a folder or in an archive
+    """
+    archive, member = _splitArchivePath(path)
+    if archive is not None:
+        return archive.mtime(member)
+    return os.stat(path).st_mtime_ns
+
+
+def exists(path: str):
+    archive, member = _splitArchivePath(path)
+    if archive is not None:
+        return archive.exists(member)
+    return os.path.exists(path)
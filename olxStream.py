@@ -0,0 +1,79 @@
+import os
+from collections import namedtuple
+import olxSource
+import xmlBackend
+
+# url_name and attributes of the root element of a sequential/vertical file
+OlxNode = namedtuple('OlxNode', ['url_name', 'attrib'])
+# one problem reference in traversal order, sequential and vertical are OlxNode,
+# the same OlxNode object is shared by all problems of one sequential/vertical
+ProblemRef = namedtuple('ProblemRef', ['sequential', 'vertical', 'problem'])
+
+
+def readRootAttrib(xml_path: str):
+    """
+    Attributes of the root element, only the beginning of the file is parsed
+    """
+    with olxSource.openBinary(xml_path) as xml_file:
+        for event, element in xmlBackend.backend.iterparse(xml_file, ('start',)):
+            return dict(element.attrib)
+
+
+def iterChildUrlNames(xml_path: str, child_tag: str):
+    """
+    Stream an OLX file, yields (root attributes, url_name) for every direct <child_tag> child
+
+    Processed children are cleared from the root, so the parsed part of the file
+    does not grow with the number of children
+    """
+    root = None
+    root_attrib = None
+    depth = 0
+    with olxSource.openBinary(xml_path) as xml_file:
+        for event, element in xmlBackend.backend.iterparse(xml_file, ('start', 'end')):
+            if event == 'start':
+                if root is None:
+                    root = element
+                    root_attrib = dict(element.attrib)
+                depth += 1
+                continue
+
+            depth -= 1
+            if depth == 1:
+                if element.tag == child_tag:
+                    yield root_attrib, element.get('url_name')
+                root.clear()
+
+
+def iterChapterProblems(chapter_xml_file: str, course_directory: str = ''):
+    """
+    Streaming traversal of a chapter:
+    chapter (root)
+      |--sequential
+            |--vertical
+                  |--problem
+
+    yields ProblemRef(sequential, vertical, problem url_name) in chapter order,
+    every file is streamed with iterparse, at most one chapter, sequential and
+    vertical file are open at a time
+
+    :param : chapter_xml_file: str, (relative) path to chapter.xml
+    :param : course_directory: str, root of the OLX export holding sequential/ and vertical/,
+             a folder or a .tar.gz archive (see olxSource)
+    """
+    sequential_directory = os.path.join(course_directory, 'sequential')
+    vertical_directory = os.path.join(course_directory, 'vertical')
+
+    for _, seq_name in iterChildUrlNames(chapter_xml_file, 'sequential'):
+        sequential = None
+        seq_path = os.path.join(sequential_directory, f'{seq_name}.xml')
+        for seq_attrib, vert_name in iterChildUrlNames(seq_path, 'vertical'):
+            if sequential is None:
+                sequential = OlxNode(seq_name, seq_attrib)
+
+            vertical = None
+            vert_path = os.path.join(vertical_directory, f'{vert_name}.xml')
+            for vert_attrib, prob_name in iterChildUrlNames(vert_path, 'problem'):
+                if vertical is None:
+                    vertical = OlxNode(vert_name, vert_attrib)
+                yield ProblemRef(sequential, vertical, prob_name)
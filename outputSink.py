@@ -0,0 +1,202 @@
+import io
+import os
+import time
+import tarfile
+import zipfile
+import hashlib
+from collections import namedtuple
+import olxSource
+from incremental import writeIfChanged
+from staticAssets import placeFile
+
+# a file of the course (static asset) placed into the tree as it is, kept by MemorySink instead of its content
+LinkedFile = namedtuple("LinkedFile", ["source_path"])
+
+
+class FileSystemSink:
+    """
+    Default sink, writes the PrairieLearn tree into folders on disk,
+    files that already hold the same content are left untouched
+    """
+    writes_to_folders = True # worker processes may write themselves
+
+    def makedirs(self, path: str, exist_ok: bool = False):
+        os.makedirs(path, exist_ok=exist_ok)
+
+    def exists(self, path: str):
+        return os.path.exists(path)
+
+    def write(self, path: str, content: str):
+        writeIfChanged(path, content)
+
+    def linkFile(self, source_path: str, path: str):
+        """
+        Place source_path at path as a reflink or hard link, copied when neither is possible
+        """
+        placeFile(source_path, path)
+
+    def whenWritten(self, callback):
+        """
+        Call callback once the files written so far are complete, at once here
+        """
+        callback()
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+FILE_SYSTEM_SINK = FileSystemSink()
+
+
+class MemorySink:
+    """
+    Keeps the generated files in memory, {path relative to root: content},
+    without a root the paths are kept as they were written
+    """
+    writes_to_folders = False
+
+    def __init__(self, root: str = None):
+        self.root = root
+        self.files = dict()
+        self._directories = set()
+
+    def _relative(self, path: str):
+        if self.root is None:
+            return os.path.normpath(path)
+        return os.path.relpath(path, self.root).replace(os.sep, '/')
+
+    def makedirs(self, path: str, exist_ok: bool = False):
+        directory = self._relative(path)
+        if not exist_ok and directory in self._directories:
+            raise FileExistsError(path)
+        while directory and directory not in ('.', os.sep):
+            self._directories.add(directory)
+            directory = os.path.dirname(directory)
+
+    def exists(self, path: str):
+        relative_path = self._relative(path)
+        return relative_path in self._directories or relative_path in self.files
+
+    def write(self, path: str, content: str):
+        relative_path = self._relative(path)
+        self.makedirs(os.path.dirname(path) or os.curdir, exist_ok=True)
+        self.files[relative_path] = content
+
+    def linkFile(self, source_path: str, path: str):
+        relative_path = self._relative(path)
+        self.makedirs(os.path.dirname(path) or os.curdir, exist_ok=True)
+        self.files[relative_path] = LinkedFile(source_path)
+
+    def whenWritten(self, callback):
+        callback()
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class _ArchiveSink(MemorySink):
+    """
+    Streams each file into an archive as soon as it is written,
+    only the names are kept in memory
+    """
+    def __init__(self, root: str = None):
+        super().__init__(root)
+        self._linked_members = dict() # {content hash: first member with that content}
+
+    def write(self, path: str, content: str):
+        relative_path = self._relative(path)
+        self.makedirs(os.path.dirname(path) or os.curdir, exist_ok=True)
+        self.files[relative_path] = None
+        self._add(relative_path, content.encode("utf-8"))
+
+    def linkFile(self, source_path: str, path: str):
+        """
+        Archives hold the bytes of a linked file, repeated contents are
+        added once where the format allows it (see _addDuplicate)
+        """
+        relative_path = self._relative(path)
+        self.makedirs(os.path.dirname(path) or os.curdir, exist_ok=True)
+        self.files[relative_path] = None
+        data = olxSource.readBytes(source_path)
+        content_hash = hashlib.sha256(data).hexdigest()
+        first_member = self._linked_members.setdefault(content_hash, relative_path)
+        if first_member == relative_path:
+            self._add(relative_path, data)
+        else:
+            self._addDuplicate(relative_path, first_member, data)
+
+    def _addDuplicate(self, relative_path: str, first_member: str, data: bytes):
+        self._add(relative_path, data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+class TarSink(_ArchiveSink):
+    """
+    Writes the tree as one .tar stream, gzip compressed for .tar.gz/.tgz
+
+    :param : archive_path: str, the archive to create
+    :param : root: str, output folder the archive stands for, member names are relative to it
+    """
+    def __init__(self, archive_path: str, root: str = os.curdir):
+        super().__init__(root)
+        mode = "w|gz" if archive_path.endswith((".tar.gz", ".tgz")) else "w|"
+        self._tar = tarfile.open(archive_path, mode)
+
+    def _add(self, relative_path: str, data: bytes):
+        member = tarfile.TarInfo(relative_path)
+        member.size = len(data)
+        member.mtime = int(time.time())
+        self._tar.addfile(member, io.BytesIO(data))
+
+    def _addDuplicate(self, relative_path: str, first_member: str, data: bytes):
+        # a hard link member, extracted as a link to the first copy
+        member = tarfile.TarInfo(relative_path)
+        member.type = tarfile.LNKTYPE
+        member.linkname = first_member
+        member.mtime = int(time.time())
+        self._tar.addfile(member)
+
+    def close(self):
+        self._tar.close()
+
+
+class ZipSink(_ArchiveSink):
+    """
+    Writes the tree as one deflated .zip archive
+
+    :param : archive_path: str, the archive to create
+    :param : root: str, output folder the archive stands for, member names are relative to it
+    """
+    def __init__(self, archive_path: str, root: str = os.curdir):
+        super().__init__(root)
+        self._zip = zipfile.ZipFile(archive_path, "w", compression=zipfile.ZIP_DEFLATED)
+
+    def _add(self, relative_path: str, data: bytes):
+        self._zip.writestr(relative_path, data)
+
+    def close(self):
+        self._zip.close()
+
+
+def openSink(output_archive: str = None, root: str = os.curdir):
+    """
+    Sink for an output archive path: .zip, .tar, .tar.gz/.tgz,
+    FILE_SYSTEM_SINK when no archive is given
+    """
+    if output_archive is None:
+        return FILE_SYSTEM_SINK
+    if output_archive.endswith(".zip"):
+        return ZipSink(output_archive, root)
+    assert output_archive.endswith((".tar", ".tar.gz", ".tgz")), "output archive needs to be .zip, .tar or .tar.gz"
+    return TarSink(output_archive, root)
@@ -0,0 +1,72 @@
+import os
+from collections import OrderedDict
+import olxSource
+import xmlBackend
+
+DEFAULT_CACHE_SIZE = 512 # number of parsed documents kept in memory
+
+
+class ParseCache:
+    """
+    LRU cache of parsed OLX documents, keyed by path and modification time
+    so an edited file is parsed again
+
+    Cached trees are shared between callers and must not be modified
+    """
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE):
+        assert isinstance(maxsize, int) and maxsize >= 0, "maxsize needs to be a non-negative integer"
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._trees = OrderedDict() # path -> (mtime, tree)
+
+    def parse(self, path: str):
+        """
+        Parse path with the active xml backend (see xmlBackend), reusing the cached tree when the file is unchanged,
+        path may point into an archived export (see olxSource)
+        """
+        key = os.path.normpath(path)
+        mtime = olxSource.getMtime(key)
+
+        entry = self._trees.get(key)
+        if entry is not None and entry[0] == mtime:
+            self.hits += 1
+            self._trees.move_to_end(key)
+            return entry[1]
+
+        self.misses += 1
+        with olxSource.openBinary(key) as xml_file:
+            tree = xmlBackend.backend.parse(xml_file)
+        if self.maxsize > 0:
+            self._trees[key] = (mtime, tree)
+            self._trees.move_to_end(key)
+            while len(self._trees) > self.maxsize:
+                self._trees.popitem(last=False)
+        return tree
+
+    def resize(self, maxsize: int):
+        """
+        Change the size limit, evicting least recently used trees, 0 disables caching
+        """
+        assert isinstance(maxsize, int) and maxsize >= 0, "maxsize needs to be a non-negative integer"
+        self.maxsize = maxsize
+        while len(self._trees) > self.maxsize:
+            self._trees.popitem(last=False)
+
+    def clear(self):
+        self._trees.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._trees), "maxsize": self.maxsize}
+
+
+# cache shared by the chapter traversal and the problem converter of this process
+parse_cache = ParseCache()
+
+def parseXml(path: str):
+    """
+    Parse an OLX file through the shared parse_cache
+    """
+    return parse_cache.parse(path)
@@ -0,0 +1,177 @@
+import os, sys, json, time, argparse, threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from problemApi import convertProblemXml, contentHash
+
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_ENTRIES = 1024
+MAX_REQUEST_BYTES = 8 * 2**20
+
+
+class ResultCache:
+    """
+    LRU cache of converted problems, keyed by content hash and conversion options
+    """
+    def __init__(self, maxsize: int = DEFAULT_CACHE_ENTRIES):
+        assert isinstance(maxsize, int) and maxsize >= 0, "maxsize needs to be a non-negative integer"
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            result = self._results.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._results.move_to_end(key)
+            return result
+
+    def put(self, key, result):
+        with self._lock:
+            if self.maxsize == 0:
+                return
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._results), "maxsize": self.maxsize}
+
+
+def warmWorker(_):
+    """
+    Run once in every worker so the pool is started and the converter imported before the first request
+    """
+    convertProblemXml(b'<problem display_name="warm up"><p>1 + 1</p>'
+                      b'<numericalresponse answer="2"/></problem>')
+    return os.getpid()
+
+
+class PreviewService:
+    """
+    Converts problems in a pool of pre-warmed worker processes (or in the calling thread
+    with workers=0), identical requests are answered from a ResultCache
+    """
+    def __init__(self, workers: int = 2, cache_entries: int = DEFAULT_CACHE_ENTRIES):
+        assert isinstance(workers, int) and workers >= 0, "workers needs to be a non-negative integer"
+        self.cache = ResultCache(cache_entries)
+        self.executor = None
+        if workers > 0:
+            self.executor = ProcessPoolExecutor(max_workers=workers)
+            # one warm up task per worker, every process is started when this returns
+            list(self.executor.map(warmWorker, range(workers)))
+        self.workers = workers
+
+    def convert(self, xml_bytes: bytes, question_title: str = None, topic: str = "preview", tags: list = None,
+                source_url: str = None):
+        """
+        :return: ({filename: content}, bool True when answered from the cache)
+        """
+        key = (contentHash(xml_bytes), question_title, topic, tuple(tags) if tags else None, source_url)
+        result = self.cache.get(key)
+        if result is not None:
+            return result, True
+
+        kwargs = dict(question_title=question_title, topic=topic, tags=tags, source_url=source_url)
+        if self.executor is not None:
+            result = self.executor.submit(convertProblemXml, xml_bytes, **kwargs).result()
+        else:
+            result = convertProblemXml(xml_bytes, **kwargs)
+        self.cache.put(key, result)
+        return result, False
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+
+
+class PreviewRequestHandler(BaseHTTPRequestHandler):
+    """
+    POST /convert with the problem .xml as body, optional query parameters
+    title, topic, tags (comma separated) and source_url; answers
+    {"files": {filename: content}, "cached": bool, "milliseconds": float}
+
+    GET /stats answers the cache statistics
+    """
+    service = None # PreviewService, set by serve()
+
+    def _reply(self, status: int, body: dict):
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if urlparse(self.path).path != "/stats":
+            self._reply(404, {"error": "not found"})
+            return
+        self._reply(200, {"workers": self.service.workers, "cache": self.service.cache.stats()})
+
+    def do_POST(self):
+        request_url = urlparse(self.path)
+        if request_url.path != "/convert":
+            self._reply(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        if length <= 0 or length > MAX_REQUEST_BYTES:
+            self._reply(413 if length > 0 else 400, {"error": f"body needs 1 to {MAX_REQUEST_BYTES} bytes of problem xml"})
+            return
+        xml_bytes = self.rfile.read(length)
+
+        query = {name: values[-1] for name, values in parse_qs(request_url.query).items()}
+        tags = query["tags"].split(",") if "tags" in query else None
+        start_time = time.perf_counter()
+        try:
+            files, cached = self.service.convert(xml_bytes, question_title=query.get("title"),
+                                                 topic=query.get("topic", "preview"), tags=tags,
+                                                 source_url=query.get("source_url"))
+        except ValueError as conversion_error:
+            self._reply(400, {"error": str(conversion_error)})
+            return
+        self._reply(200, {"files": files, "cached": cached,
+                          "milliseconds": 1000 * (time.perf_counter() - start_time)})
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def serve(host: str = "127.0.0.1", port: int = DEFAULT_PORT, workers: int = 2,
+          cache_entries: int = DEFAULT_CACHE_ENTRIES, verbose: bool = False):
+    """
+    Run the preview service until interrupted
+    """
+    PreviewRequestHandler.service = PreviewService(workers=workers, cache_entries=cache_entries)
+    server = ThreadingHTTPServer((host, port), PreviewRequestHandler)
+    server.verbose = verbose
+    print(f"preview service on http://{host}:{server.server_port}/convert with {workers} workers", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        PreviewRequestHandler.service.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local HTTP service converting single problems for authoring previews")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=2, help="worker processes, 0 converts in the server process")
+    parser.add_argument('--cache-entries', type=int, default=DEFAULT_CACHE_ENTRIES,
+                        help="converted problems kept in memory, 0 disables the cache")
+    parser.add_argument('--verbose', action='store_true', help="log every request")
+    args = parser.parse_args()
+
+    serve(args.host, args.port, workers=args.workers, cache_entries=args.cache_entries, verbose=args.verbose)
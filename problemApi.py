@@ -0,0 +1,51 @@
+import io
+import sys
+import json
+import hashlib
+import xmlBackend
+from problemIR import extractProblem
+from xmlToHtml import renderProblemFiles
+from xmlToJson import renderInfoJson, JSON_OUTPUT_FILENAME
+
+
+def contentHash(xml_bytes: bytes):
+    return hashlib.sha256(xml_bytes).hexdigest()
+
+
+def convertProblemXml(xml_bytes: bytes, question_title: str = None, topic: str = "preview", tags: list = None,
+                      source_url: str = None):
+    """
+    Convert one problem without touching the disk
+
+    :param : xml_bytes: bytes (or str), content of a problem .xml
+    :param : question_title: str, defaults to the display_name of the problem
+    :param : source_url: str, edX url_name of the problem, defaults to the content hash
+             so the uuid in info.json is the same for the same content
+    :return: {filename: content} with question.html and info.json
+             (and server.py for numerical response problems),
+             only info.json for unsupported problems
+    """
+    if isinstance(xml_bytes, str):
+        xml_bytes = xml_bytes.encode("utf-8")
+    assert isinstance(xml_bytes, bytes), "xml_bytes needs to be bytes or str"
+    if tags is None:
+        tags = [topic]
+
+    try:
+        root = xmlBackend.backend.parse(io.BytesIO(xml_bytes)).getroot()
+    except xmlBackend.backend.ParseError as parse_error:
+        raise ValueError(f"invalid problem xml: {parse_error}") from None
+
+    if question_title is None:
+        question_title = root.get('display_name', '')
+    if source_url is None:
+        source_url = contentHash(xml_bytes)
+
+    output_files = renderProblemFiles(extractProblem(root))
+    output_files[JSON_OUTPUT_FILENAME] = renderInfoJson(question_title, topic, tags, source_url=source_url)
+    return output_files
+
+
+if __name__ == "__main__":
+    # convert a problem read from stdin, print the files as json
+    print(json.dumps(convertProblemXml(sys.stdin.buffer.read()), indent=2))
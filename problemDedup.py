@@ -0,0 +1,70 @@
+import os
+import hashlib
+import xml.etree.ElementTree as ET
+import olxSource
+
+
+def normalizedHash(prob_path: str):
+    """
+    Hash of the canonical form (C14N 2.0) of a problem, comments, attribute order
+    and whitespace around texts do not change it
+    """
+    canonical_xml = ET.canonicalize(olxSource.readBytes(prob_path), strip_text=True)
+    return hashlib.sha256(canonical_xml.encode("utf-8")).hexdigest()
+
+
+def folderBytes(path: str):
+    """
+    Total size of the files directly inside path, None when it is not a folder on disk
+    """
+    try:
+        with os.scandir(path) as entries:
+            return sum(entry.stat().st_size for entry in entries if entry.is_file())
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+class ProblemDeduplicator:
+    """
+    Remembers the converted question of every distinct problem content,
+    so repeated problems (the same xml in several verticals or chapters)
+    are converted once and their zones point to that question
+
+    Share one between the chapters of a course (see fetchCourse)
+    """
+    def __init__(self):
+        self.questions = dict()     # {content hash: (question id, output problem path)}
+        self.duplicates = dict()    # {content hash: number of repeated occurrences}
+
+    def lookup(self, content_hash: str):
+        """
+        :return: (question id, output problem path) of an already converted problem, or None
+        """
+        return self.questions.get(content_hash)
+
+    def register(self, content_hash: str, question_id: str, output_prob_path: str):
+        self.questions.setdefault(content_hash, (question_id, output_prob_path))
+
+    def addDuplicate(self, content_hash: str):
+        self.duplicates[content_hash] = self.duplicates.get(content_hash, 0) + 1
+
+    def summary(self, seconds_per_problem: float = None):
+        """
+        :param : seconds_per_problem: float, mean conversion time, estimates the time saved
+        :return: dict with the number of distinct problems and duplicates, the estimated
+                 seconds and the bytes saved (None when the output is not a folder on disk)
+        """
+        num_duplicates = sum(self.duplicates.values())
+        bytes_saved = 0
+        for content_hash, count in self.duplicates.items():
+            question_bytes = folderBytes(self.questions[content_hash][1])
+            if question_bytes is None:
+                bytes_saved = None
+                break
+            bytes_saved += count * question_bytes
+        return {
+            "distinct": len(self.questions),
+            "duplicates": num_duplicates,
+            "seconds_saved": num_duplicates * seconds_per_problem if seconds_per_problem is not None else None,
+            "bytes_saved": bytes_saved,
+        }
@@ -0,0 +1,174 @@
+import xmlBackend
+from staticAssets import STATIC_ATTRIBUTE_PATTERN
+
+
+class ProblemIR:
+    """
+    Everything xmlToHtml renders from a problem, filled by extractProblem()
+    in a single traversal of the problem tree
+    """
+    __slots__ = (
+        "problem_format",       # "multiple-choice", "checkbox", "numerical" or None (unsupported)
+        "label",                # serialized first <label> (with its tail), or None
+        "question_paragraphs",  # texts of the first <p> and the <p> directly nested in it
+        "paragraph_run",        # texts of the consecutive <p> elements starting at the first <p>
+        "choices",              # [(correct, text)] of every <choice>
+        "hints",                # [(text, [child texts], static markup)] of every <hint>
+        "explanations",         # [[paragraph texts]] of every <div class="detailed-solution">
+        "ul_texts",             # [text of the first item] of every <ul>
+        "numeric_responses",    # [(answer, text of the <p> elements since the previous response)]
+        "static_references",    # paths below /static/ of every src, href, ... attribute, in document order
+    )
+
+    def __init__(self):
+        self.problem_format = None
+        self.label = None
+        self.question_paragraphs = []
+        self.paragraph_run = []
+        self.choices = []
+        self.hints = []
+        self.explanations = []
+        self.ul_texts = []
+        self.numeric_responses = []
+        self.static_references = []
+
+
+def extractProblem(root):
+    """
+    Fill a ProblemIR from the root <problem> element with one pre-order traversal
+
+    :param : root: root element of a parsed problem .xml
+    :return: ProblemIR
+    """
+    ir = ProblemIR()
+
+    # Determine question format from the direct children
+    element_tags = [child.tag for child in root]
+    if "choiceresponse" in element_tags:
+        ir.problem_format = "checkbox"
+    elif "multiplechoiceresponse" in element_tags:
+        ir.problem_format = "multiple-choice"
+    elif "numericalresponse" in element_tags:
+        ir.problem_format = "numerical"
+
+    # the renderers keep only the text of <p>, <choice>, <hint> and solution elements, an element
+    # referencing /static/ is serialized into the entry of the innermost one enclosing it:
+    # [(depth, [(ir field, index)] or None when the enclosing element is serialized whole)]
+    enclosing = []
+    static_references = set()
+
+    first_p_depth = None        # depth of the first <p>, None until it is found
+    in_question_paragraphs = False
+    in_paragraph_run = False
+    sub_question_text = None    # None until the first <numericalresponse>
+
+    # pre-order traversal, same order as root.iter()
+    stack = [(root, 0)]
+    while stack:
+        element, depth = stack.pop()
+        tag = element.tag
+        while enclosing and enclosing[-1][0] >= depth:
+            enclosing.pop()
+
+        if element.attrib:
+            reference = staticReference(element)
+            if reference is not None:
+                if reference not in static_references:
+                    static_references.add(reference)
+                    ir.static_references.append(reference)
+                if enclosing and enclosing[-1][1] is not None:
+                    markup = xmlBackend.backend.tostring(element, with_tail=False)
+                    for field, index in enclosing[-1][1]:
+                        if field == "sub_question":
+                            sub_question_text += markup + ' '
+                        else:
+                            _appendMarkup(ir, field, index, markup)
+                # the serialized element holds the references below it
+                enclosing.append((depth, None))
+
+        if tag == 'p':
+            entries = []
+            if first_p_depth is None:
+                first_p_depth = depth
+                in_question_paragraphs = True
+                in_paragraph_run = True
+                ir.question_paragraphs.append(element.text)
+                ir.paragraph_run.append(element.text)
+                entries = [("question_paragraphs", len(ir.question_paragraphs) - 1),
+                           ("paragraph_run", len(ir.paragraph_run) - 1)]
+            else:
+                if in_question_paragraphs and depth > first_p_depth:
+                    ir.question_paragraphs.append(element.text)
+                    entries.append(("question_paragraphs", len(ir.question_paragraphs) - 1))
+                else:
+                    in_question_paragraphs = False
+                if in_paragraph_run:
+                    ir.paragraph_run.append(element.text)
+                    entries.append(("paragraph_run", len(ir.paragraph_run) - 1))
+            if sub_question_text is not None:
+                sub_question_text += (element.text or '').strip() + ' '
+                entries.append(("sub_question", None))
+            if entries:
+                enclosing.append((depth, entries))
+        else:
+            in_question_paragraphs = False
+            in_paragraph_run = False
+
+            if tag == 'label':
+                if ir.label is None:
+                    ir.label = xmlBackend.backend.tostring(element)
+                enclosing.append((depth, None))
+            elif tag == 'choice':
+                is_correct = "true" if element.get("correct") == "true" else "false"
+                choice_text = ""
+                for text_element in element:
+                    if len(text_element) > 0:
+                        choice_text += text_element.text or ''
+                choice_text += (element.text or '').strip()
+                ir.choices.append((is_correct, choice_text))
+                enclosing.append((depth, [("choices", len(ir.choices) - 1)]))
+            elif tag == 'hint':
+                ir.hints.append((element.text, [child.text for child in element], ''))
+                enclosing.append((depth, [("hints", len(ir.hints) - 1)]))
+            elif tag == 'div' and element.get('class') == 'detailed-solution':
+                ir.explanations.append([child.text.strip() for child in element if child.text is not None])
+                enclosing.append((depth, [("explanations", len(ir.explanations) - 1)]))
+            elif tag == 'ul':
+                ir.ul_texts.append((element[0].text or '').strip() if len(element) > 0 else '')
+            elif tag == 'numericalresponse':
+                ir.numeric_responses.append((element.get("answer"), sub_question_text or ''))
+                sub_question_text = ''
+
+        # push children reversed so that the first child is visited next
+        for child in reversed(element):
+            stack.append((child, depth + 1))
+
+    return ir
+
+
+def staticReference(element):
+    """
+    Path below /static/ an attribute of element points to, None without one
+    """
+    for value in element.attrib.values():
+        match = STATIC_ATTRIBUTE_PATTERN.fullmatch(value)
+        if match is not None:
+            return match.group(1)
+    return None
+
+
+def _appendMarkup(ir, field: str, index: int, markup: str):
+    """
+    Add the serialized markup to an entry of ir the renderers only keep the text of
+    """
+    entries = getattr(ir, field)
+    if field == "choices":
+        is_correct, choice_text = entries[index]
+        entries[index] = (is_correct, choice_text + markup)
+    elif field == "hints":
+        hint_text, hint_child_texts, hint_markup = entries[index]
+        entries[index] = (hint_text, hint_child_texts, hint_markup + markup)
+    elif field == "explanations":
+        entries[index].append(markup)
+    else:
+        entries[index] = (entries[index] or '') + markup
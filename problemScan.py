@@ -0,0 +1,55 @@
+import re
+import olxSource
+
+UNSUPPORTED = "unsupported"
+PROBLEM_TYPES = ("multiple-choice", "checkbox", "numerical", UNSUPPORTED)
+
+# response tags xmlToHtml converts, in the precedence of extractProblem()
+RESPONSE_TAG_FORMATS = (
+    (b"choiceresponse", "checkbox"),
+    (b"multiplechoiceresponse", "multiple-choice"),
+    (b"numericalresponse", "numerical"),
+)
+RESPONSE_TAGS = {tag: problem_format for tag, problem_format in RESPONSE_TAG_FORMATS}
+# markup that is not an element, skipped by the scan: comments, CDATA, processing instructions, doctype
+NON_ELEMENT_PATTERN = rb"<!--.*?-->|<!\[CDATA\[.*?\]\]>|<\?.*?\?>|<![^>]*>"
+# start, end and empty element tags, quoted attribute values may hold '>'
+ELEMENT_TAG_PATTERN = rb"<(/?)([^\s/>]+)((?:[^>\"']|\"[^\"]*\"|'[^']*')*)>"
+TAG_PATTERN = re.compile(rb"(?:" + NON_ELEMENT_PATTERN + rb")|" + ELEMENT_TAG_PATTERN, re.DOTALL)
+
+
+def scanProblemType(prob_path: str):
+    """
+    Problem type from the response tags among the root's children, read from the raw bytes
+    of the file by following the element depth, no tree is built
+
+    Agrees with the format extractProblem() finds: tags in comments or CDATA and
+    tags nested deeper than the root's children are not counted
+
+    :param : prob_path: str, path of the problem .xml, in a folder or in an archive (see olxSource)
+    :return: str, one of PROBLEM_TYPES
+    """
+    found_tags = set()
+    depth = 0
+    with olxSource.mapBytes(prob_path) as content:
+        for match in TAG_PATTERN.finditer(content):
+            tag = match.group(2)
+            if tag is None: # not an element
+                continue
+            if match.group(1): # end tag
+                depth -= 1
+                if depth == 0: # end of the root
+                    break
+                continue
+            if depth == 1 and tag in RESPONSE_TAGS:
+                found_tags.add(tag)
+                # highest precedence, nothing else can change the result
+                if tag == RESPONSE_TAG_FORMATS[0][0]:
+                    break
+            if not match.group(3).endswith(b"/"):
+                depth += 1
+
+    for tag, problem_format in RESPONSE_TAG_FORMATS:
+        if tag in found_tags:
+            return problem_format
+    return UNSUPPORTED
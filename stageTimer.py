@@ -0,0 +1,123 @@
+import json
+import time
+from collections import defaultdict
+
+STAGES = ["traverse", "parse", "classify", "render", "write"]
+
+
+class _NullStage:
+    """
+    Shared no-op context manager used while timing is disabled
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("_records", "_key", "_name", "_start_time")
+
+    def __init__(self, records, key, name):
+        self._records = records
+        self._key = key
+        self._name = name
+
+    def __enter__(self):
+        self._start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        stages = self._records[self._key]
+        stages[self._name] = stages.get(self._name, 0.0) + time.perf_counter() - self._start_time
+        return False
+
+
+class StageTimer:
+    """
+    Wall time per stage per problem, {url_name: {stage: seconds}},
+    time spent in the same stage of the same url_name adds up
+    """
+    def __init__(self):
+        self.records = defaultdict(dict)
+
+    def stage(self, key: str, name: str):
+        return _Stage(self.records, key, name)
+
+    def take(self, key: str):
+        """
+        Remove and return the stages recorded for key, used to ship worker timings to the main process
+        """
+        return self.records.pop(key, {})
+
+    def add(self, key: str, stages: dict):
+        for name, seconds in stages.items():
+            self.records[key][name] = self.records[key].get(name, 0.0) + seconds
+
+    def report(self, slowest: int = 10):
+        """
+        :return: dict with totals and percentiles per stage and the slowest problems
+        """
+        per_stage = defaultdict(list)
+        for stages in self.records.values():
+            for name, seconds in stages.items():
+                per_stage[name].append(seconds)
+
+        def percentile(ordered, fraction):
+            return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+        stage_report = dict()
+        for name, values in per_stage.items():
+            ordered = sorted(values)
+            stage_report[name] = {
+                "total_seconds": sum(ordered),
+                "count": len(ordered),
+                "p50_seconds": percentile(ordered, 0.50),
+                "p95_seconds": percentile(ordered, 0.95),
+                "p99_seconds": percentile(ordered, 0.99),
+                "max_seconds": ordered[-1],
+            }
+
+        totals = sorted(((sum(stages.values()), key) for key, stages in self.records.items()), reverse=True)
+        return {
+            "num_records": len(self.records), # problems and chapters (infoAssessment.json)
+            "stages": stage_report,
+            "slowest": [{"url_name": key, "total_seconds": total, "stages": self.records[key]}
+                        for total, key in totals[:slowest]],
+        }
+
+    def writeReport(self, report_path: str, slowest: int = 10):
+        with open(report_path, "w", encoding="utf-8") as report_file:
+            json.dump(self.report(slowest), report_file, indent=2)
+
+
+# timer of this process, None while timing is disabled
+_timer = None
+
+def enableTiming():
+    global _timer
+    if _timer is None:
+        _timer = StageTimer()
+    return _timer
+
+def disableTiming():
+    global _timer
+    timer, _timer = _timer, None
+    return timer
+
+def activeTimer():
+    return _timer
+
+def stage(key: str, name: str):
+    """
+    Time a stage of problem key, e.g. with stage(url_name, "parse"): ...
+    costs one global lookup while timing is disabled
+    """
+    if _timer is None:
+        return NULL_STAGE
+    return _timer.stage(key, name)
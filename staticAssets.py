@@ -0,0 +1,173 @@
+import os
+import re
+import sys
+import errno
+import shutil
+import hashlib
+import olxSource
+
+try:
+    import fcntl
+except ImportError: # not available on Windows
+    fcntl = None
+
+# PrairieLearn serves the files of a question's clientFilesQuestion folder under this url
+CLIENT_FILES_DIRECTORY = "clientFilesQuestion"
+CLIENT_FILES_URL = "{{options.client_files_question_url}}"
+STATIC_DIRECTORY = "static"
+
+# quoted /static/... references in the rendered html, src="/static/fig.png", href='/static/a/b.pdf'
+STATIC_REFERENCE_PATTERN = re.compile(r"""(["'])/static/([^"'?#\s]+)\1""")
+# the same reference as a whole attribute value of the problem .xml
+STATIC_ATTRIBUTE_PATTERN = re.compile(r"""/static/([^"'?#\s]+)""")
+
+# ioctl cloning a file on Linux (btrfs, xfs, ...), fcntl.FICLONE from python 3.12 on
+FICLONE = getattr(fcntl, "FICLONE", 0x40049409) if fcntl is not None and sys.platform.startswith("linux") else None
+
+# per process: (source device, target device) pairs that cannot reflink,
+# {content hash: placed output file} so identical assets are copied once
+_no_reflink = set()
+_placed_copies = dict()
+
+
+def staticDirectory(prob_path: str):
+    """
+    static folder of the course a problem belongs to, problem/x.xml -> static,
+    also inside an archived export
+    """
+    return os.path.join(os.path.dirname(os.path.dirname(prob_path)), STATIC_DIRECTORY)
+
+
+def assetName(reference: str):
+    """
+    Normalized path of a /static/ reference, None when it leaves the static folder
+    """
+    asset_name = os.path.normpath(reference).replace(os.sep, '/')
+    if asset_name.startswith(("../", "/")) or asset_name in ('.', '..'):
+        return None
+    return asset_name
+
+
+def resolveStaticAssets(references: list, static_directory: str):
+    """
+    Files of the /static/ references of a problem (see problemIR), references to missing
+    files (or outside the static folder) are left out
+
+    :return: {path relative to clientFilesQuestion: source file}
+    """
+    assets = dict()
+    for reference in references:
+        asset_name = assetName(reference)
+        if asset_name is None or asset_name in assets:
+            continue
+        source_path = os.path.join(static_directory, asset_name)
+        if olxSource.exists(source_path):
+            assets[asset_name] = source_path
+    return assets
+
+
+def rewriteStaticReferences(html: str, assets: dict):
+    """
+    Point the /static/ references of a question.html to the question's clientFilesQuestion folder,
+    references to files that are not in assets (see resolveStaticAssets) are left as they are
+    """
+    def rewrite(match):
+        quote, asset_name = match.group(1), assetName(match.group(2))
+        if asset_name not in assets:
+            return match.group(0)
+        return f"{quote}{CLIENT_FILES_URL}/{asset_name}{quote}"
+
+    return STATIC_REFERENCE_PATTERN.sub(rewrite, html)
+
+
+def fileHash(path: str):
+    sha = hashlib.sha256()
+    with olxSource.openBinary(path) as asset_file:
+        for block in iter(lambda: asset_file.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def _sameFile(first_path: str, second_path: str):
+    try:
+        return os.path.samefile(first_path, second_path)
+    except OSError:
+        return False
+
+
+def _sameContent(path: str, content_hash: str):
+    try:
+        return fileHash(path) == content_hash
+    except OSError:
+        return False
+
+
+def _reflink(source_path: str, temporary_path: str):
+    """
+    Copy-on-write clone of source_path, False when the file system cannot clone
+    """
+    if FICLONE is None:
+        return False
+    devices = (os.stat(source_path).st_dev, os.stat(os.path.dirname(temporary_path)).st_dev)
+    if devices in _no_reflink:
+        return False
+    with open(source_path, "rb") as source_file, open(temporary_path, "wb") as target_file:
+        try:
+            fcntl.ioctl(target_file.fileno(), FICLONE, source_file.fileno())
+            return True
+        except OSError as clone_error:
+            if clone_error.errno not in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS):
+                raise
+    os.remove(temporary_path)
+    _no_reflink.add(devices)
+    return False
+
+
+def _hardlink(source_path: str, temporary_path: str):
+    try:
+        os.link(source_path, temporary_path)
+        return True
+    except OSError: # other device, no hard links on this file system, link limit
+        return False
+
+
+def placeFile(source_path: str, target_path: str):
+    """
+    Put the static asset source_path at target_path without copying its bytes when possible:
+    a reflink (copy-on-write clone), else a hard link (target and source are the same file then,
+    edit neither in place), else a copy; assets with the same content are copied once per process,
+    later ones are hard links to that copy. Files inside archived exports are always copied
+
+    :return: str, "unchanged", "reflink", "hardlink" or "copy"
+    """
+    if os.path.exists(target_path) and _sameFile(source_path, target_path):
+        return "unchanged"
+    os.makedirs(os.path.dirname(target_path) or os.curdir, exist_ok=True)
+    # placed under a temporary name and moved over target_path, a reader never sees half a file
+    temporary_path = f"{target_path}.{os.getpid()}.tmp"
+
+    in_archive = olxSource.inArchive(source_path)
+    if not in_archive:
+        if _reflink(source_path, temporary_path):
+            os.replace(temporary_path, target_path)
+            return "reflink"
+        if _hardlink(source_path, temporary_path):
+            os.replace(temporary_path, target_path)
+            return "hardlink"
+
+    content_hash = fileHash(source_path)
+    if os.path.exists(target_path) and _sameContent(target_path, content_hash):
+        return "unchanged"
+    placed_path = _placed_copies.get(content_hash)
+    if placed_path is not None and _hardlink(placed_path, temporary_path):
+        os.replace(temporary_path, target_path)
+        return "hardlink"
+
+    if in_archive:
+        with olxSource.openBinary(source_path) as source_file, open(temporary_path, "wb") as target_file:
+            shutil.copyfileobj(source_file, target_file, 1 << 20)
+    else:
+        shutil.copyfile(source_path, temporary_path)
+    os.replace(temporary_path, target_path)
+    _placed_copies[content_hash] = target_path
+    return "copy"
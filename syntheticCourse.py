@@ -0,0 +1,170 @@
+import os, random, argparse
+
+# problem kinds the generator can emit, see generateProblem()
+PROBLEM_KINDS = ["multiple-choice", "checkbox", "numerical", "numerical-multi-ul", "numerical-multi"]
+
+
+def generateProblem(kind: str, display_name: str, rng, num_choices: int = 4, num_responses: int = 3,
+                    num_paragraphs: int = 2, with_label: bool = False, with_hints: bool = True, with_solution: bool = True):
+    """
+    Build the OLX of one synthetic problem
+
+    :param : kind: str, one of PROBLEM_KINDS
+             numerical-multi-ul: several <numericalresponse>, each sub question in a <ul>
+             numerical-multi: several <numericalresponse>, sub questions in plain <p>
+    :param : rng: random.Random used for answers and correct choices
+    :return: str, problem .xml content
+    """
+    assert kind in PROBLEM_KINDS, f"unknown problem kind {kind}"
+
+    lines = [f'<problem display_name="{display_name}" markdown="null">']
+    paragraphs = [f'<p>Paragraph {idx + 1} of {display_name}, describing the setup of the problem.</p>'
+                  for idx in range(num_paragraphs)]
+
+    if kind in ("multiple-choice", "checkbox"):
+        response_tag, group_tag = (("multiplechoiceresponse", "choicegroup type=\"MultipleChoice\"")
+                                   if kind == "multiple-choice" else ("choiceresponse", "checkboxgroup"))
+        if not with_label:
+            lines += paragraphs
+        lines.append(f'<{response_tag}>')
+        if with_label:
+            lines.append(f'<label>Which statement about {display_name} is correct?</label>')
+        lines.append(f'<{group_tag}>')
+        correct = rng.randrange(num_choices)
+        for idx in range(num_choices):
+            is_correct = "true" if idx == correct or (kind == "checkbox" and rng.random() < 0.3) else "false"
+            lines.append(f'<choice correct="{is_correct}">Choice {idx + 1}</choice>')
+        lines.append(f'</{group_tag.split()[0]}>')
+        lines.append(f'</{response_tag}>')
+
+    elif kind == "numerical":
+        lines += paragraphs
+        lines.append(f'<numericalresponse answer="{rng.uniform(0, 100):.3f}">')
+        if with_label:
+            lines.append('<label>Enter the value</label>')
+        lines.append('<responseparam type="tolerance" default="1%"/>')
+        lines.append('<formulaequationinput/>')
+        lines.append('</numericalresponse>')
+
+    else:
+        lines += paragraphs
+        for idx in range(num_responses):
+            if kind == "numerical-multi-ul":
+                lines.append(f'<ul><li>Part {idx + 1}: compute quantity {idx + 1}.</li></ul>')
+            else:
+                lines.append(f'<p>Part {idx + 1}: compute quantity {idx + 1}.</p>')
+            lines.append(f'<numericalresponse answer="{rng.uniform(0, 100):.3f}">')
+            lines.append('<formulaequationinput/>')
+            lines.append('</numericalresponse>')
+
+    if with_hints:
+        lines.append('<demandhint>')
+        lines.append('<hint>Start from the definition.</hint>')
+        lines.append('<hint>Check your units.</hint>')
+        lines.append('</demandhint>')
+    if with_solution:
+        lines.append('<solution>')
+        lines.append('<div class="detailed-solution">')
+        lines.append('<p>Explanation</p>')
+        lines.append(f'<p>Worked solution of {display_name}.</p>')
+        lines.append('</div>')
+        lines.append('</solution>')
+
+    lines.append('</problem>')
+    return '\n'.join(lines) + '\n'
+
+
+def generateCourse(course_directory: str, num_chapters: int = 2, sequentials_per_chapter: int = 3,
+                   verticals_per_sequential: int = 4, problems_per_vertical: int = 2,
+                   problem_mix: dict = None, hint_ratio: float = 0.5, solution_ratio: float = 0.5,
+                   label_ratio: float = 0.3, seed: int = 0):
+    """
+    Write a synthetic OLX course export:
+    course.xml
+      |--course/<url_name>.xml
+            |--chapter
+                  |--sequential
+                        |--vertical
+                              |--problem
+
+    :param : course_directory: str, folder the export is written into
+    :param : problem_mix: dict, {problem kind: weight}, defaults to all PROBLEM_KINDS equally
+    :param : hint_ratio, solution_ratio, label_ratio: float, share of problems with hints,
+             a detailed solution, and a <label> instead of a <p> question
+    :param : seed: int, the same seed writes the same course
+    :return: dict, {problem url_name: problem kind}
+    """
+    if problem_mix is None:
+        problem_mix = {kind: 1 for kind in PROBLEM_KINDS}
+    kinds = list(problem_mix)
+    weights = [problem_mix[kind] for kind in kinds]
+    rng = random.Random(seed)
+
+    for directory in ['course', 'chapter', 'sequential', 'vertical', 'problem']:
+        os.makedirs(os.path.join(course_directory, directory), exist_ok=True)
+
+    def write(relative_path, content):
+        with open(os.path.join(course_directory, relative_path), 'w', encoding='utf-8') as xml_file:
+            xml_file.write(content)
+
+    problem_kinds = dict()
+    chapter_names = []
+    for chapter_idx in range(1, num_chapters + 1):
+        sequential_names = []
+        for seq_idx in range(1, sequentials_per_chapter + 1):
+            vertical_names = []
+            for vert_idx in range(1, verticals_per_sequential + 1):
+                problem_names = []
+                for prob_idx in range(1, problems_per_vertical + 1):
+                    prob_name = f'p{chapter_idx:02d}{seq_idx:02d}{vert_idx:02d}{prob_idx:02d}'
+                    kind = rng.choices(kinds, weights)[0]
+                    write(f'problem/{prob_name}.xml', generateProblem(
+                        kind, f'{chapter_idx}.{seq_idx}.{vert_idx} Problem {prob_idx}', rng,
+                        with_label=rng.random() < label_ratio,
+                        with_hints=rng.random() < hint_ratio,
+                        with_solution=rng.random() < solution_ratio))
+                    problem_kinds[prob_name] = kind
+                    problem_names.append(prob_name)
+
+                vert_name = f'v{chapter_idx:02d}{seq_idx:02d}{vert_idx:02d}'
+                write(f'vertical/{vert_name}.xml',
+                      f'<vertical display_name="Question {chapter_idx}.{seq_idx}.{vert_idx}">\n'
+                      + ''.join(f'  <problem url_name="{prob_name}"/>\n' for prob_name in problem_names)
+                      + '</vertical>\n')
+                vertical_names.append(vert_name)
+
+            seq_name = f's{chapter_idx:02d}{seq_idx:02d}'
+            write(f'sequential/{seq_name}.xml',
+                  f'<sequential display_name="{chapter_idx}.{seq_idx} Section {seq_idx}">\n'
+                  + ''.join(f'  <vertical url_name="{vert_name}"/>\n' for vert_name in vertical_names)
+                  + '</sequential>\n')
+            sequential_names.append(seq_name)
+
+        chapter_name = f'c{chapter_idx:02d}'
+        write(f'chapter/{chapter_name}.xml',
+              f'<chapter display_name="Chapter {chapter_idx}: Synthetic" highlights="[&quot;first&quot;, &quot;second&quot;]">\n'
+              + ''.join(f'  <sequential url_name="{seq_name}"/>\n' for seq_name in sequential_names)
+              + '</chapter>\n')
+        chapter_names.append(chapter_name)
+
+    write('course.xml', '<course url_name="synthetic" org="Synthetic" course="S101"/>\n')
+    write('course/synthetic.xml', '<course display_name="Synthetic Course">\n'
+          + ''.join(f'  <chapter url_name="{chapter_name}"/>\n' for chapter_name in chapter_names)
+          + '</course>\n')
+
+    return problem_kinds
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic OLX course export")
+    parser.add_argument('course_directory')
+    parser.add_argument('--chapters', type=int, default=2)
+    parser.add_argument('--sequentials', type=int, default=3, help="sequentials per chapter")
+    parser.add_argument('--verticals', type=int, default=4, help="verticals per sequential")
+    parser.add_argument('--problems', type=int, default=2, help="problems per vertical")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    problem_kinds = generateCourse(args.course_directory, args.chapters, args.sequentials,
+                                   args.verticals, args.problems, seed=args.seed)
+    print(f"{len(problem_kinds)} problems written to {args.course_directory}")
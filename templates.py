@@ -0,0 +1,130 @@
+from string import Formatter
+
+
+class CompiledTemplate:
+    """
+    Template split once into (literal, field name) pairs,
+    rendering appends the pieces to a list buffer that is joined once by the caller
+
+    Fields use str.format syntax without format specs, e.g. "<p>{paragraph}</p>"
+    """
+    __slots__ = ("_parts",)
+
+    def __init__(self, source: str):
+        self._parts = tuple((literal, field) for literal, field, _, _ in Formatter().parse(source))
+
+    def render_into(self, buffer: list, **fields):
+        for literal, field in self._parts:
+            if literal:
+                buffer.append(literal)
+            if field is not None:
+                buffer.append(str(fields[field]))
+
+
+# question panel
+QUESTION_PANEL_OPEN = CompiledTemplate("""
+<pl-question-panel>
+""")
+QUESTION_PANEL_CLOSE = CompiledTemplate("""
+</pl-question-panel>
+""")
+PARAGRAPH = CompiledTemplate("""
+<p>{paragraph}</p>
+""")
+LABEL_PANEL = CompiledTemplate("""
+<pl-question-panel>
+<p>{label}</p>
+</pl-question-panel>
+""")
+LABEL_PANEL_OPEN = CompiledTemplate("""
+<pl-question-panel>
+<p>{label}</p>
+""")
+
+# pl-multiple-choice and pl-checkbox, keyed by problem format
+CHOICE_OPEN = {
+    "checkbox": CompiledTemplate("""
+<div class="card-body">
+    <pl-checkbox answers-name="multichoice_1" fixed-order=true partial-credit=true hide-letter-keys=true partial-credit-method="EDC">
+"""),
+    "multiple-choice": CompiledTemplate("""
+<div class="card-body">
+    <pl-multiple-choice answers-name="multichoice_1" fixed-order=true hide-letter-keys=true>
+"""),
+}
+CHOICE_ANSWER = CompiledTemplate("""      <pl-answer correct="{correct}">{text}</pl-answer>
+""")
+CHOICE_CLOSE = {
+    "checkbox": CompiledTemplate("""
+    </pl-checkbox>
+</div>
+
+"""),
+    "multiple-choice": CompiledTemplate("""
+    </pl-multiple-choice>
+</div>
+
+"""),
+}
+
+# pl-number-input
+NUMBER_INPUT = CompiledTemplate("""
+<div class="card my-2">
+    <div class="card-body">
+        <pl-number-input answers-name="ans" label="$ans=$" rtol="1e-2" atol="1e-2"></pl-number-input>
+    </div>
+</div>
+""")
+NUMBER_INPUT_SUB_QUESTION = CompiledTemplate("""
+<div class="card my-2">
+    <div class="card-body">
+        <pl-question-panel>
+        <p> {text} </p>
+        </pl-question-panel>
+        <pl-number-input answers-name="ans_{number}" label="$ans_{number}=$" rtol="1e-2" atol="1e-2"></pl-number-input>
+    </div>
+</div>
+""")
+
+# hints
+HINTS_OPEN = CompiledTemplate("""
+<pl-hidden-hints>
+""")
+HINTS_CLOSE = CompiledTemplate("""
+</pl-hidden-hints>
+""")
+CHOICE_HINT = CompiledTemplate("""
+    <pl-hint show-after-submission={show_after}>
+    {hint}
+    </pl-hint>
+""")
+NUMERICAL_HINT = CompiledTemplate("""
+<pl-hint show-after-submission={show_after}>
+{hint}
+</pl-hint>
+""")
+
+# answer panel
+CHOICE_ANSWER_PANEL_OPEN = CompiledTemplate("""
+<pl-answer-panel>
+    <div class="detailed-solution"> 
+""")
+NUMERICAL_ANSWER_PANEL_OPEN = CompiledTemplate("""
+<pl-answer-panel>
+    <div class="detailed-solution">
+""")
+EXPLANATION = CompiledTemplate("""
+    <p>{explanation}</p>
+""")
+ANSWER_PANEL_CLOSE = CompiledTemplate("""
+    </div>
+</pl-answer-panel>
+""")
+
+# server.py
+SERVER_GENERATE = CompiledTemplate("""
+def generate(data):
+""")
+SERVER_CORRECT_ANSWER = CompiledTemplate("""
+    data["correct_answers"]["{name}"] = {answer}
+""")
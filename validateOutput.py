@@ -0,0 +1,244 @@
+import os, sys, json, hashlib, argparse
+from html.parser import HTMLParser
+from concurrent.futures import ProcessPoolExecutor
+
+VALIDATION_CACHE_FILENAME = ".validate_cache.json"
+# files checked, by name
+HTML_FILENAMES = ("question.html",)
+JSON_FILENAMES = ("info.json", "infoAssessment.json")
+PYTHON_FILENAMES = ("server.py",)
+# files every question a zone lists needs
+QUESTION_FILENAMES = ("info.json", "question.html")
+
+# html elements without a closing tag
+VOID_ELEMENTS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+
+class TagBalanceChecker(HTMLParser):
+    """
+    Collects unclosed, unexpected and mismatched tags of an html document
+    """
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.open_tags = [] # [(tag, line)]
+        self.errors = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag not in VOID_ELEMENTS:
+            self.open_tags.append((tag, self.getpos()[0]))
+
+    def handle_endtag(self, tag):
+        if tag in VOID_ELEMENTS:
+            return
+        if not any(open_tag == tag for open_tag, _ in self.open_tags):
+            self.errors.append(f"line {self.getpos()[0]}: unexpected </{tag}>")
+            return
+        # close the innermost matching tag, everything opened after it was left open
+        while True:
+            open_tag, line = self.open_tags.pop()
+            if open_tag == tag:
+                break
+            self.errors.append(f"line {line}: <{open_tag}> is not closed before </{tag}> on line {self.getpos()[0]}")
+
+    def close(self):
+        super().close()
+        for open_tag, line in self.open_tags:
+            self.errors.append(f"line {line}: <{open_tag}> is not closed")
+        self.open_tags = []
+
+
+def checkHtml(content: str):
+    checker = TagBalanceChecker()
+    checker.feed(content)
+    checker.close()
+    return checker.errors
+
+
+def checkJson(content: str):
+    try:
+        document = json.loads(content)
+    except ValueError as json_error:
+        return [f"invalid json: {json_error}"]
+    if not isinstance(document, dict):
+        return ["expected a json object"]
+    return []
+
+
+def checkPython(content: str, filename: str):
+    try:
+        compile(content, filename, "exec")
+    except (SyntaxError, ValueError) as compile_error:
+        return [f"does not compile: {compile_error}"]
+    return []
+
+
+def validateContent(path: str, content: bytes):
+    """
+    Errors of one generated file, chosen by its name
+
+    :return: (path, list of error messages)
+    """
+    filename = os.path.basename(path)
+    try:
+        text = content.decode("utf-8")
+    except UnicodeDecodeError as decode_error:
+        return path, [f"not utf-8: {decode_error}"]
+
+    if filename in HTML_FILENAMES:
+        return path, checkHtml(text)
+    if filename in JSON_FILENAMES:
+        return path, checkJson(text)
+    if filename in PYTHON_FILENAMES:
+        return path, checkPython(text, filename)
+    return path, []
+
+
+def validatorHash():
+    """
+    Hash of this module, a changed validator invalidates the cache
+    """
+    with open(os.path.abspath(__file__), "rb") as module_file:
+        return hashlib.sha256(module_file.read()).hexdigest()
+
+
+def loadValidationCache(output_directory: str):
+    """
+    {"<file name>:<content hash>": [errors]} of the previous validation of output_directory
+    """
+    try:
+        with open(os.path.join(output_directory, VALIDATION_CACHE_FILENAME), "r", encoding="utf-8") as cache_file:
+            cache = json.load(cache_file)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if cache.get("validator") != validatorHash():
+        return {}
+    return cache.get("results", {})
+
+
+def saveValidationCache(output_directory: str, results: dict):
+    with open(os.path.join(output_directory, VALIDATION_CACHE_FILENAME), "w", encoding="utf-8") as cache_file:
+        json.dump({"validator": validatorHash(), "results": results}, cache_file)
+
+
+def loadAssessment(assessment_path: str):
+    with open(assessment_path, "r", encoding="utf-8") as assessment_file:
+        try:
+            assessment = json.load(assessment_file)
+        except ValueError:
+            return {} # reported by checkJson
+    return assessment if isinstance(assessment, dict) else {}
+
+
+def checkZones(output_directory: str, assessment: dict):
+    """
+    Every question of an infoAssessment.json needs a converted question folder
+    holding QUESTION_FILENAMES, question ids are relative to output_directory
+    """
+    errors = []
+    for zone in assessment.get("zones", []):
+        for question in zone.get("questions", []):
+            question_id = question.get("id", "")
+            if not os.path.isdir(os.path.join(output_directory, question_id)):
+                errors.append(f"zone \"{zone.get('title')}\": question {question_id} does not exist")
+                continue
+            for filename in QUESTION_FILENAMES:
+                if not os.path.isfile(os.path.join(output_directory, question_id, filename)):
+                    errors.append(f"zone \"{zone.get('title')}\": question {question_id} has no {filename}")
+    return errors
+
+
+def validateTree(output_directory: str, jobs: int = None, use_cache: bool = True):
+    """
+    Check every generated file below output_directory:
+    question.html tags are balanced, info.json and infoAssessment.json parse,
+    server.py compiles, the zones of every assessment point to converted questions
+    and no two assessments share a number
+
+    Files are checked in a process pool, results are cached by content hash
+    in VALIDATION_CACHE_FILENAME so unchanged files are not checked again
+
+    :param : jobs: int, number of worker processes, defaults to the number of cpus, 1 checks in this process
+    :return: {relative path: list of error messages} of the files with errors, number of checked files
+    """
+    assert isinstance(output_directory, str)
+    assert os.path.isdir(output_directory), f"{output_directory} is not a folder"
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    assert isinstance(jobs, int) and jobs >= 1, "jobs needs to be a positive integer"
+
+    checked_names = HTML_FILENAMES + JSON_FILENAMES + PYTHON_FILENAMES
+    previous_results = loadValidationCache(output_directory) if use_cache else {}
+    results = dict()         # {cache key: errors} of this validation
+    errors_by_path = dict()
+    to_check = []            # [(relative path, content, cache key)]
+    assessment_paths = []
+    num_files = 0
+
+    for directory, _, filenames in os.walk(output_directory):
+        for filename in filenames:
+            if filename not in checked_names:
+                continue
+            path = os.path.join(directory, filename)
+            relative_path = os.path.relpath(path, output_directory).replace(os.sep, '/')
+            with open(path, "rb") as output_file:
+                content = output_file.read()
+            num_files += 1
+            if filename == "infoAssessment.json":
+                assessment_paths.append((relative_path, path))
+
+            cache_key = f"{filename}:{hashlib.sha256(content).hexdigest()}"
+            if cache_key in previous_results:
+                results[cache_key] = previous_results[cache_key]
+                if results[cache_key]:
+                    errors_by_path[relative_path] = list(results[cache_key])
+            else:
+                to_check.append((relative_path, content, cache_key))
+
+    cache_keys = {relative_path: cache_key for relative_path, _, cache_key in to_check}
+    if jobs > 1 and len(to_check) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            checked = list(executor.map(validateContent, [item[0] for item in to_check], [item[1] for item in to_check],
+                                        chunksize=max(1, len(to_check) // (4 * jobs))))
+    else:
+        checked = [validateContent(relative_path, content) for relative_path, content, _ in to_check]
+    for relative_path, errors in checked:
+        results[cache_keys[relative_path]] = errors
+        if errors:
+            errors_by_path[relative_path] = list(errors)
+
+    # zones and numbers depend on the whole tree, they are never cached
+    assessment_numbers = dict() # {number: relative path of the first assessment with it}
+    for relative_path, path in sorted(assessment_paths):
+        assessment = loadAssessment(path)
+        tree_errors = checkZones(output_directory, assessment)
+        number = assessment.get("number")
+        if number is not None:
+            if number in assessment_numbers:
+                tree_errors.append(f"assessment number {number} is also used by {assessment_numbers[number]}")
+            else:
+                assessment_numbers[number] = relative_path
+        if tree_errors:
+            errors_by_path.setdefault(relative_path, []).extend(tree_errors)
+
+    if use_cache:
+        saveValidationCache(output_directory, results)
+    return errors_by_path, num_files
+
+
+def printValidation(errors_by_path: dict, num_files: int, file=sys.stderr):
+    for relative_path in sorted(errors_by_path):
+        for error in errors_by_path[relative_path]:
+            print(f"{relative_path}: {error}", file=file)
+    print(f"validated {num_files} files, {len(errors_by_path)} with errors", file=file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate a generated PrairieLearn tree")
+    parser.add_argument('output_directory', help="output folder of fetchCourse / fetchProblemFromChapter")
+    parser.add_argument('--jobs', type=int, default=None, help="number of worker processes, defaults to the number of cpus")
+    parser.add_argument('--no-cache', action='store_true', help=f"check every file again and do not write {VALIDATION_CACHE_FILENAME}")
+    args = parser.parse_args()
+
+    errors_by_path, num_files = validateTree(args.output_directory, jobs=args.jobs, use_cache=not args.no_cache)
+    printValidation(errors_by_path, num_files)
+    sys.exit(1 if errors_by_path else 0)
@@ -0,0 +1,234 @@
+import os, sys, time, shutil, argparse
+from fetchCourse import findChapters, assignChapterNumbers
+from fetchProblemFromChapter import fetchProblemFromChapter, convertProblem
+from parseCache import parseXml
+from olxStream import iterChildUrlNames
+from nameRegistry import NameRegistry
+import olxSource
+from eventLog import configureLogging, LOG_LEVELS
+
+# folders of an OLX export whose files are polled
+WATCHED_DIRECTORIES = ("chapter", "sequential", "vertical", "problem")
+# files of the course structure, a change reconverts every chapter
+COURSE_FILES = ("course.xml",)
+DEFAULT_POLL_INTERVAL = 0.25 # seconds
+
+
+def snapshotFiles(course_directory: str):
+    """
+    {relative path: (mtime in ns, size)} of the .xml files in WATCHED_DIRECTORIES,
+    course.xml and course/
+    """
+    snapshot = dict()
+    for directory in WATCHED_DIRECTORIES + ("course",):
+        try:
+            entries = os.scandir(os.path.join(course_directory, directory))
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.name.endswith(".xml") and entry.is_file():
+                    file_stat = entry.stat()
+                    snapshot[f"{directory}/{entry.name}"] = (file_stat.st_mtime_ns, file_stat.st_size)
+    for name in COURSE_FILES:
+        try:
+            file_stat = os.stat(os.path.join(course_directory, name))
+        except FileNotFoundError:
+            continue
+        snapshot[name] = (file_stat.st_mtime_ns, file_stat.st_size)
+    return snapshot
+
+
+def changedFiles(old_snapshot: dict, new_snapshot: dict):
+    """
+    Relative paths added, removed or modified between two snapshots
+    """
+    changed = {path for path, state in new_snapshot.items() if old_snapshot.get(path) != state}
+    changed.update(path for path in old_snapshot if path not in new_snapshot)
+    return changed
+
+
+class CourseWatcher:
+    """
+    Keeps the structure of a converted course in memory and reconverts
+    only what a change to the OLX files affects:
+    - an edited problem is converted again into its folder
+    - a changed chapter, sequential or vertical (or a renamed problem, its folder name
+      depends on display_name) converts its chapter again in incremental mode,
+      which also writes its infoAssessment.json and removes the folders of renamed
+      or removed problems (see incremental.removeStaleFolders)
+    - a changed course.xml converts every chapter again
+    - output folders of chapters no longer in the course (or renumbered) are removed
+    """
+    def __init__(self, course_directory: str, output_base_directory: str, verbose: bool = True):
+        assert isinstance(course_directory, str)
+        assert isinstance(output_base_directory, str)
+        assert not olxSource.isArchive(course_directory), "watch mode needs an OLX export folder"
+
+        self.course_directory = course_directory
+        self.output_base_directory = output_base_directory
+        self.verbose = verbose
+
+        self.chapters = []          # chapter url_names in course order
+        self.plans = dict()         # {chapter url_name: plan filled by fetchProblemFromChapter}
+        self.numbers = dict()       # {chapter url_name: chapter number, see fetchCourse.assignChapterNumbers}
+        self.owners = dict()        # {chapter/sequential/vertical relative path: set of chapter url_names}
+        self.problems = dict()      # {problem relative path: [(chapter url_name, convertProblem kwargs)]}
+        self.snapshot = dict()
+
+    def _log(self, message: str):
+        if self.verbose:
+            print(f"[{time.strftime('%H:%M:%S')}] {message}", file=sys.stderr)
+
+    def _chapterPath(self, chapter_name: str):
+        return os.path.join(self.course_directory, 'chapter', f'{chapter_name}.xml')
+
+    def _index(self):
+        """
+        Rebuild the lookup tables from self.plans
+        """
+        self.owners = dict()
+        self.problems = dict()
+        for chapter_name in self.chapters:
+            self.owners.setdefault(f"chapter/{chapter_name}.xml", set()).add(chapter_name)
+            for _, seq_name in iterChildUrlNames(self._chapterPath(chapter_name), 'sequential'):
+                seq_path = f"sequential/{seq_name}.xml"
+                self.owners.setdefault(seq_path, set()).add(chapter_name)
+                if not os.path.exists(os.path.join(self.course_directory, seq_path)):
+                    continue
+                for _, vert_name in iterChildUrlNames(os.path.join(self.course_directory, seq_path), 'vertical'):
+                    self.owners.setdefault(f"vertical/{vert_name}.xml", set()).add(chapter_name)
+
+            for convert_kwargs in self.plans.get(chapter_name, {}).get("problems", []):
+                prob_path = f"problem/{convert_kwargs['prob_name']}.xml"
+                self.problems.setdefault(prob_path, []).append((chapter_name, convert_kwargs))
+
+    def _convertChapters(self, chapter_names: set):
+        """
+        Convert the given chapters, and the chapters whose number changed (a renamed
+        chapter can take or free a number), numbered like fetchCourse does
+
+        :return: list of the converted chapter url_names in course order
+        """
+        numbers = assignChapterNumbers(self.course_directory, self.chapters)
+        group = [name for name in self.chapters if name in chapter_names or self.numbers.get(name) != numbers[name]]
+        self.numbers = numbers
+
+        # every chapter has its own output folder, one registry is enough
+        name_registry = NameRegistry()
+        for chapter_name in group:
+            plan = dict()
+            fetchProblemFromChapter(self._chapterPath(chapter_name), self.output_base_directory,
+                                    course_directory=self.course_directory, incremental=True,
+                                    name_registry=name_registry, plan=plan, chapter_number=numbers[chapter_name])
+            self.plans[chapter_name] = plan
+        return group
+
+    def _removeUnusedDirectories(self, output_directories: set):
+        """
+        Remove the chapter output folders no chapter converts into anymore
+        (a chapter removed from the course or moved to another number)
+        """
+        used_directories = {plan["output_directory"] for plan in self.plans.values()}
+        for output_directory in sorted(output_directories - used_directories):
+            if os.path.isdir(output_directory):
+                shutil.rmtree(output_directory)
+                self._log(f"removed {output_directory}")
+
+    def start(self):
+        """
+        Convert the whole course (unchanged problems of a previous run are skipped)
+        """
+        start_time = time.perf_counter()
+        self.snapshot = snapshotFiles(self.course_directory)
+        self.chapters = findChapters(self.course_directory)
+        self.plans = dict()
+        self.numbers = dict()
+        self._convertChapters(set(self.chapters))
+        self._index()
+        num_problems = sum(len(plan["problems"]) for plan in self.plans.values())
+        self._log(f"watching {num_problems} problems in {len(self.chapters)} chapters "
+                  f"({time.perf_counter() - start_time:.2f}s)")
+
+    def poll(self):
+        """
+        Reconvert what changed since the previous poll
+
+        :return: set of changed relative paths
+        """
+        new_snapshot = snapshotFiles(self.course_directory)
+        changed = changedFiles(self.snapshot, new_snapshot)
+        self.snapshot = new_snapshot
+        if not changed:
+            return changed
+
+        start_time = time.perf_counter()
+        course_changed = any(path in COURSE_FILES or path.startswith("course/") for path in changed)
+        previous_directories = {plan["output_directory"] for plan in self.plans.values()}
+        if course_changed:
+            self.chapters = findChapters(self.course_directory)
+            self.plans = {name: plan for name, plan in self.plans.items() if name in self.chapters}
+
+        chapters_to_convert = set(self.chapters) if course_changed else set()
+        problems_to_convert = []
+        for path in sorted(changed):
+            if path in self.owners:
+                chapters_to_convert.update(self.owners[path])
+            elif path in self.problems:
+                problems_to_convert.append(path)
+            # anything else is not referenced by the course
+
+        num_converted = 0
+        for path in problems_to_convert:
+            for chapter_name, convert_kwargs in self.problems[path]:
+                if chapter_name in chapters_to_convert:
+                    continue
+                # the folder name depends on display_name, a renamed problem changes the chapter
+                display_name = parseXml(convert_kwargs['prob_path']).getroot().attrib['display_name']
+                if display_name != convert_kwargs['question_title']:
+                    chapters_to_convert.add(chapter_name)
+                    continue
+                convertProblem(**convert_kwargs)
+                num_converted += 1
+                self._log(f"converted {path} into {convert_kwargs['output_prob_path']}")
+
+        if chapters_to_convert:
+            converted_chapters = self._convertChapters(chapters_to_convert)
+            self._index()
+            self._log(f"structure changed, converted chapters {', '.join(converted_chapters)}")
+
+        self._removeUnusedDirectories(previous_directories)
+
+        self._log(f"{len(changed)} changed files, {num_converted} problems reconverted "
+                  f"in {time.perf_counter() - start_time:.3f}s")
+        return changed
+
+    def watch(self, interval: float = DEFAULT_POLL_INTERVAL):
+        """
+        Poll until interrupted, a failing conversion (e.g. a half saved file)
+        is reported and retried on the next change
+        """
+        self.start()
+        try:
+            while True:
+                time.sleep(interval)
+                try:
+                    self.poll()
+                except Exception as conversion_error:
+                    self._log(f"conversion failed: {conversion_error!r}")
+        except KeyboardInterrupt:
+            self._log("stopped")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert an OLX course export and reconvert what changes while authors edit it")
+    parser.add_argument('course_directory', help="OLX export folder containing course.xml")
+    parser.add_argument('output_base_directory', help="output folder")
+    parser.add_argument('--interval', type=float, default=DEFAULT_POLL_INTERVAL, help="seconds between polls")
+    parser.add_argument('--log', default=None, help="write the event log (json lines) into this file instead of stderr")
+    parser.add_argument('--log-level', choices=LOG_LEVELS, default="info",
+                        help="debug logs every sequential, vertical and problem")
+    args = parser.parse_args()
+
+    configureLogging(args.log_level, args.log)
+    CourseWatcher(args.course_directory, args.output_base_directory).watch(interval=args.interval)
@@ -2,10 +2,24 @@ import xml.etree.ElementTree as ET
 import os
 import uuid
 import json
+import logging
+from incremental import stableUuid
+from outputSink import FILE_SYSTEM_SINK
+from stageTimer import stage
+from eventLog import getLogger
 
-def writeAssessJson(assessment_title: str, assessment_number: str, zones: list, assessment_text: str, output_base_directory: str):
+log = getLogger("writeAssessJson")
+
+
+def writeAssessJson(assessment_title: str, assessment_number: str, zones: list, assessment_text: str, output_base_directory: str,
+                    source_url: str = None, sink=None):
     """
     Write Assessment level .json, dump meta data from chapter, sequential, and vertical
+
+    The uuid is derived from source_url (chapter url_name) so it is stable between runs,
+    a random uuid is used when no source_url is given
+
+    :param : sink: where the file goes (see outputSink), defaults to the file system
     """
     assert isinstance(assessment_title, str)
     assert(isinstance(assessment_number, str), "assessment_number needs to be passed as a string")
@@ -14,59 +28,51 @@ def writeAssessJson(assessment_title: str, assessment_number: str, zones: list,
     assert isinstance(output_base_directory, str)
 
     # Constants and Variables
-    verbose = False
     ASS_JSON_OUTPUT_FILENAME = "infoAssessment.json"
+    if sink is None:
+        sink = FILE_SYSTEM_SINK
 
-    # Generate a random UUID (Version 4)
-    random_uuid = uuid.uuid4()
+    # UUID (Version 5) from the url_name, random UUID (Version 4) without it
+    assessment_uuid = stableUuid(source_url) if source_url is not None else uuid.uuid4()
 
-    if verbose:
-        print('='*20)
-        print("Dumping assessment .json metadata")
-        print("Random UUID (Version 4):", random_uuid)
-        print(f"Assessment Title: {assessment_title}, Number: {assessment_number}")
-        print(f"zones: {zones}")
-        print("output_base_direactory: ", output_base_directory)
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("assessment metadata", extra={"fields": {"uuid": str(assessment_uuid), "title": assessment_title,
+                                                           "number": assessment_number, "zones": zones,
+                                                           "output_directory": output_base_directory}})
 
     # write basic informations
-    json_output = f"""
-{{
-    "uuid": "{random_uuid}",
-    "type": "Exam",
-    "title": "{assessment_title}",
-    "set": "Homework",
-    "number": "{assessment_number}",
-    "multipleInstance": false,
-    "shuffleQuestions": false,
-    "requireHonorCode": false,
-    "autoClose": false,
-    "allowAccess": [
-        {{
+    assessment = dict()
+    assessment["uuid"] = str(assessment_uuid)
+    assessment["type"] = "Exam"
+    assessment["title"] = assessment_title
+    assessment["set"] = "Homework"
+    assessment["number"] = assessment_number
+    assessment["multipleInstance"] = False
+    assessment["shuffleQuestions"] = False
+    assessment["requireHonorCode"] = False
+    assessment["autoClose"] = False
+    assessment["allowAccess"] = [
+        {
             "mode": "Public",
             "credit": 100,
             "startDate": "2024-09-01T00:00:01",
             "endDate": "2024-09-30T23:59:59",
             "uids": []
-        }}
-    ],
-"""
+        }
+    ]
 
     # add problem to zones
-    json_output += "\"zones\": "
-    zones_json_string = json.dumps(zones, indent=2)
-    json_output += zones_json_string
+    assessment["zones"] = zones
 
     ## add assessment description (chapter highlights on EdX)
     if assessment_title is not None:
-        json_output +=',\n'
-        json_output += f"""
-    "text": "<p>{assessment_text}</p>"
-}}
-"""
-    # print(json_output)
-
-    with open(os.path.join(output_base_directory, ASS_JSON_OUTPUT_FILENAME), "w", encoding="utf-8") as ass_json_file:
-        ass_json_file.write(json_output)
+        assessment["text"] = f"<p>{assessment_text}</p>"
+
+    # serialize once, titles and highlights may contain quotes
+    json_output = json.dumps(assessment, indent=4, ensure_ascii=False) + "\n"
+
+    with stage(source_url, "write"):
+        sink.write(os.path.join(output_base_directory, ASS_JSON_OUTPUT_FILENAME), json_output)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,107 @@
+import os
+import xml.etree.ElementTree as ET
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:
+    lxml_etree = None
+
+# XML_BACKEND=lxml|etree picks the parser, etree by default: with lxml the per-file iterparse
+# and copying labels back into ElementTree (see LxmlBackend.tostring) make whole conversions
+# slower (see benchmark.benchBackends), it is opt-in
+BACKEND_ENVIRONMENT_VARIABLE = "XML_BACKEND"
+BACKENDS = ("lxml", "etree")
+DEFAULT_BACKEND = "etree"
+
+
+def availableBackends():
+    return [name for name in BACKENDS if name != "lxml" or lxml_etree is not None]
+
+
+class EtreeBackend:
+    """
+    xml.etree.ElementTree from the standard library
+    """
+    name = "etree"
+    ParseError = ET.ParseError
+
+    def parse(self, xml_file):
+        return ET.parse(xml_file)
+
+    def iterparse(self, xml_file, events):
+        return ET.iterparse(xml_file, events=events)
+
+    def tostring(self, element, with_tail: bool = True):
+        if not with_tail and element.tail:
+            # the children are shared, not copied, the parsed tree is left as it is
+            copy = ET.Element(element.tag, element.attrib)
+            copy.text = element.text
+            copy.extend(element)
+            element = copy
+        return ET.tostring(element, encoding="unicode")
+
+
+class LxmlBackend:
+    """
+    lxml's C parser, comments and processing instructions are dropped
+    like ElementTree does, so both backends build the same trees
+    """
+    name = "lxml"
+
+    def __init__(self):
+        assert lxml_etree is not None, "lxml is not installed"
+        self.ParseError = lxml_etree.XMLSyntaxError
+        self._parser = lxml_etree.XMLParser(remove_comments=True, remove_pis=True, no_network=True)
+
+    def parse(self, xml_file):
+        return lxml_etree.parse(xml_file, self._parser)
+
+    def iterparse(self, xml_file, events):
+        return lxml_etree.iterparse(xml_file, events=events, remove_comments=True, remove_pis=True,
+                                    no_network=True)
+
+    def tostring(self, element, with_tail: bool = True):
+        # lxml keeps namespace prefixes and quotes differently, the (small) subtree
+        # is copied into ElementTree so the serialized text is the same for both backends
+        copy = toEtree(element)
+        if not with_tail:
+            copy.tail = None
+        return ET.tostring(copy, encoding="unicode")
+
+
+def toEtree(element):
+    """
+    ElementTree copy of an lxml element, tail included
+    """
+    copy = ET.Element(element.tag, dict(element.attrib))
+    copy.text = element.text
+    copy.tail = element.tail
+    for child in element:
+        copy.append(toEtree(child))
+    return copy
+
+
+def createBackend(name: str = None):
+    """
+    :param : name: "lxml", "etree" or None for $XML_BACKEND, falling back to DEFAULT_BACKEND
+    """
+    if name is None:
+        name = os.environ.get(BACKEND_ENVIRONMENT_VARIABLE) or DEFAULT_BACKEND
+    assert name in BACKENDS, f"unknown xml backend {name}, choose from {', '.join(BACKENDS)}"
+    if name == "lxml":
+        return LxmlBackend()
+    return EtreeBackend()
+
+
+# backend of this process, used by parseCache, olxStream and problemIR
+backend = createBackend()
+
+def setBackend(name: str = None):
+    """
+    Switch the backend of this process, worker processes started
+    afterwards inherit it through $XML_BACKEND
+    """
+    global backend
+    backend = createBackend(name)
+    os.environ[BACKEND_ENVIRONMENT_VARIABLE] = backend.name
+    return backend
@@ -1,343 +1,211 @@
 import os
-import xml.etree.ElementTree as ET
+import logging
+from parseCache import parseXml
+from outputSink import FILE_SYSTEM_SINK
+from problemIR import extractProblem
+import templates as T
+from stageTimer import stage
+from staticAssets import staticDirectory, resolveStaticAssets, rewriteStaticReferences, CLIENT_FILES_DIRECTORY
+from eventLog import getLogger
 
-def xmlToHtml(prob_path: str, output_base_directory: str):
+#Constants:
+SHOW_HINT_AFTER = "1"
+HTML_OUTPUT_FILENAME = "question.html"
+PYTHON_OUTPUT_FILENAME = "server.py"
+
+log = getLogger("xmlToHtml")
+
+
+def renderChoiceHtml(ir):
     """
-    Dumps problem descriptions into .html file
+    question.html of a multiple-choice or checkbox problem
+
+    :param : ir: ProblemIR
     """
-    assert isinstance(prob_path, str)
-    assert isinstance(output_base_directory, str)
+    problem_format = ir.problem_format
 
-    #Constants and Variables:
-    SHOW_HINT_AFTER = "1"
-    verbose = False
-    HTML_OUTPUT_FILENAME = "question.html"
-    PYTHON_OUTPUT_FILENAME = "server.py"
+    # Generate HTML based on the extracted data
+    html_output = []
+    if ir.label is not None:
+        T.LABEL_PANEL.render_into(html_output, label=ir.label)
 
-    # load xml data
-    prob_tree = ET.parse(prob_path)
-    root = prob_tree.getroot()
+    elif ir.question_paragraphs:
+        T.QUESTION_PANEL_OPEN.render_into(html_output)
+        for paragraph in ir.question_paragraphs:
+            T.PARAGRAPH.render_into(html_output, paragraph=paragraph)
+        T.QUESTION_PANEL_CLOSE.render_into(html_output)
 
-    element_tags = []
-    for child in root:
-        element_tags.append(child.tag)
-    if verbose:
-        print(element_tags)
+    T.CHOICE_OPEN[problem_format].render_into(html_output)
 
-    # if the problem is multichoice problem
-    if "multiplechoiceresponse" in element_tags or "choiceresponse" in element_tags:
-        # Determine question format
-        assert("multiplechoiceresponse" not in element_tags and 
-            "choiceresponse" not in element_tags, "Two types of choices conflict.")
-        if "multiplechoiceresponse" in element_tags:
-            problem_format = "multiple-choice"
-        if "choiceresponse" in element_tags:
-            problem_format = "checkbox"
-
-        # Extract relevant data from XML
-        question_element = root.find(".//p") # root.find() will find the first element
-        label_element = root.find(".//label")
-
-        choices = root.findall(".//choice")
-        hints = root.findall(".//hint")
-        explanations = root.find(".//div[@class='detailed-solution']")
-
-        # Generate HTML based on the extracted data
-        html_output = ""
-        if label_element is not None:
-            label_text = ET.tostring(label_element, encoding="unicode")
-            
-            html_output += f"""
-<pl-question-panel>
-<p>{label_text}</p>
-</pl-question-panel>
-""" 
-            if problem_format == 'checkbox':
-                html_output += f"""
-<div class="card-body">
-    <pl-{problem_format} answers-name="multichoice_1" fixed-order=true partial-credit=true hide-letter-keys=true partial-credit-method="EDC">
-"""         
-            elif problem_format == 'multiple-choice':
-                html_output += f"""
-<div class="card-body">
-    <pl-{problem_format} answers-name="multichoice_1" fixed-order=true hide-letter-keys=true>
-"""         
-
-        elif question_element is not None:
-            
-            question_paragraphs = []
-
-            for element in question_element.iter():
-                if element.tag == 'p':
-                    question_paragraphs.append(element.text)
-                else:
-                    break  # Stop when a non-<p> element is encountered
-
-            html_output += f"""
-<pl-question-panel>
-"""         
-
-            for paragraph in question_paragraphs:
-                html_output += f"""
-<p>{paragraph}</p>
-"""
-            html_output += f"""
-</pl-question-panel>
-"""
+    # parse the choices
+    for is_correct, choice_text in ir.choices:
+        T.CHOICE_ANSWER.render_into(html_output, correct=is_correct, text=choice_text)
 
-        if problem_format == 'checkbox':
-            html_output += f"""
-<div class="card-body">
-    <pl-{problem_format} answers-name="multichoice_1" fixed-order=true partial-credit=true hide-letter-keys=true partial-credit-method="EDC">
-"""
-        elif problem_format == 'multiple-choice':
-            html_output += f"""
-<div class="card-body">
-    <pl-{problem_format} answers-name="multichoice_1" fixed-order=true hide-letter-keys=true>
-"""
+    T.CHOICE_CLOSE[problem_format].render_into(html_output)
 
+    # if there are any hint to this problem
+    # parse them to the end of the problem
+    if len(ir.hints) > 0:
+        T.HINTS_OPEN.render_into(html_output)
+        for hint_text, _, hint_markup in ir.hints:
+            T.CHOICE_HINT.render_into(html_output, show_after=SHOW_HINT_AFTER, hint=(hint_text or '').strip() + hint_markup)
+        T.HINTS_CLOSE.render_into(html_output)
 
-        # parse the choices
-        for choice in choices:
-            is_correct = "true" if choice.get("correct") == "true" else "false"
-            choice_text = ""
-            for text_element in choice:
-                if text_element:
-                    choice_text += text_element.text
-            choice_text += choice.text.strip()
-            html_output += f"      <pl-answer correct=\"{is_correct}\">{choice_text}</pl-answer>\n"
+    # if there are explanations to this problem
+    # parse them to the end of the problem, only the first one is used
+    if len(ir.explanations) > 0:
+        T.CHOICE_ANSWER_PANEL_OPEN.render_into(html_output)
+        for explanation_text in ir.explanations[0]:
+            T.EXPLANATION.render_into(html_output, explanation=explanation_text)
+        T.ANSWER_PANEL_CLOSE.render_into(html_output)
 
-        html_output += f"""
-    </pl-{problem_format}>
-</div>
+    return "".join(html_output)
 
-"""
-        # if there are any hint to this problem
-        # parse them to the end of the problem
-        if len(hints) > 0:
-            html_output += """
-<pl-hidden-hints>
-"""
-            for hint in hints:
-                hint_text = hint.text.strip()
-                html_output += f"""
-    <pl-hint show-after-submission={SHOW_HINT_AFTER}>
-    {hint_text}
-    </pl-hint>
-"""     
-            html_output += """
-</pl-hidden-hints>
-"""
 
-        # if there are explanations to this problem
-        # parse them to the end of the problem
-        if explanations is not None:
-            html_output += """
-<pl-answer-panel>
-    <div class="detailed-solution"> 
-"""
-            for explanation in explanations:
-                if explanation.text is not None:
-                    explanation_text = explanation.text.strip()
-                    html_output += f"""
-    <p>{explanation_text}</p>
-"""     
-
-            html_output += """
-    </div>
-</pl-answer-panel>
-"""
-        
-        # dump output file
-        with open(os.path.join(output_base_directory, HTML_OUTPUT_FILENAME), "w", encoding="utf-8") as html_file:
-            html_file.write(html_output)
+def renderNumericalHtml(ir):
+    """
+    question.html of a numerical response problem
+
+    :param : ir: ProblemIR
+    """
+    numresponses = ir.numeric_responses
+
+    # initialize outputs
+    html_output = []
+    if ir.label is not None:
+        T.LABEL_PANEL_OPEN.render_into(html_output, label=ir.label)
+        for paragraph in ir.paragraph_run:
+            T.PARAGRAPH.render_into(html_output, paragraph=paragraph)
+        T.QUESTION_PANEL_CLOSE.render_into(html_output)
+    else:
+        T.QUESTION_PANEL_OPEN.render_into(html_output)
+        for paragraph in ir.paragraph_run:
+            T.PARAGRAPH.render_into(html_output, paragraph=paragraph)
+        T.QUESTION_PANEL_CLOSE.render_into(html_output)
+
+    # if there is only single numerical responses
+    if len(numresponses) == 1:
+        log.debug("numerical case 1: 1 numerical response")
+        T.NUMBER_INPUT.render_into(html_output)
+
+    # if there are multiple numerical responses
+    # see problem problem\3764d3faa7694190a9af35862fc57b95.xml
+    elif len(numresponses) > 1 and len(ir.ul_texts) == len(numresponses):
+        log.debug("numerical case 2: multi numerical, has uls")
+        for idx, sub_question_text in enumerate(ir.ul_texts):
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("sub question", extra={"fields": {"text": sub_question_text, "answer": numresponses[idx][0]}})
+            T.NUMBER_INPUT_SUB_QUESTION.render_into(html_output, text=sub_question_text, number=idx+1)
+
+    # if there are no uls
+    # see problem problem\7b78dc044afd491a8d840ef6a0f2353e.xml
+    elif len(numresponses) > 1:
+        log.debug("numerical case 3: multiple numericals, some uls")
+        for idx, (_, sub_question_text) in enumerate(numresponses):
+            T.NUMBER_INPUT_SUB_QUESTION.render_into(html_output, text=sub_question_text, number=idx+1)
+
+    else:
+        log.warning("numerical case 4: *** undefined case ***")
+
+    # if there are any hints to this problem
+    # parse them to the end of the problem
+    if len(ir.hints) > 0:
+        T.HINTS_OPEN.render_into(html_output)
+        for hint_text, hint_child_texts, hint_markup in ir.hints:
+            hint_text = hint_text or ''
+            if len(hint_text.strip()) == 0:
+                hint_text += ''.join((child_text or '').strip() for child_text in hint_child_texts)
+            T.NUMERICAL_HINT.render_into(html_output, show_after=SHOW_HINT_AFTER, hint=hint_text + hint_markup)
+        T.HINTS_CLOSE.render_into(html_output)
+
+    # if there are explanations to this problem
+    # parse them to the end of the problem
+    for explanation in ir.explanations:
+        T.NUMERICAL_ANSWER_PANEL_OPEN.render_into(html_output)
+        for explanation_text in explanation:
+            T.EXPLANATION.render_into(html_output, explanation=explanation_text)
+        T.ANSWER_PANEL_CLOSE.render_into(html_output)
+
+    return "".join(html_output)
+
+
+def renderServerPy(ir):
+    """
+    server.py setting the correct answers of a numerical response problem
+
+    :param : ir: ProblemIR
+    """
+    numresponses = ir.numeric_responses
+
+    py_output = []
+    T.SERVER_GENERATE.render_into(py_output)
+    if len(numresponses) == 1:
+        T.SERVER_CORRECT_ANSWER.render_into(py_output, name="ans", answer=numresponses[0][0])
+    elif len(numresponses) > 1:
+        for idx, (sub_question_ans, _) in enumerate(numresponses):
+            T.SERVER_CORRECT_ANSWER.render_into(py_output, name=f"ans_{idx+1}", answer=sub_question_ans)
+
+    return "".join(py_output)
+
+
+def renderProblemFiles(ir):
+    """
+    {filename: content} of a problem, question.html (and server.py for numerical
+    response problems), empty for unsupported problems
+
+    :param : ir: ProblemIR
+    """
+    # if the problem is multichoice problem
+    if ir.problem_format in ("multiple-choice", "checkbox"):
+        return {HTML_OUTPUT_FILENAME: renderChoiceHtml(ir)}
 
     # else if the problem requires numerical response
-    elif "numericalresponse" in element_tags:
-        # Extract relevant data from XML
-        main_question_text = ''
-        if root.find(".//p"): 
-            main_question_text = root.find(".//p").text.strip()
-        numresponses = root.findall(".//numericalresponse")
-        uls = root.findall(".//ul")
-        hints = root.findall(".//hint")
-        explanations = root.findall(".//div[@class='detailed-solution']")
-        label_element = root.find(".//label")
-
-        # initialize outputs
-        html_output = ""
-        if label_element is not None:
-            html_output = f"""
-<pl-question-panel>
-<p>{ET.tostring(label_element, encoding="unicode")}</p>
-"""
-            if main_question_text is not None:
-                question_paragraphs = []
-                start_iteration = False
-                for element in root.iter():
-                    if element.tag == 'p':
-                        start_iteration = True
-                    if start_iteration:
-                        if element.tag == 'p':
-                            question_paragraphs.append(element.text)
-                        else:
-                            break
-                for paragraph in question_paragraphs:
-                    html_output += f"""
-<p>{paragraph}</p>
-"""
-            html_output += f"""
-<pl-question-panel>
-"""         
-        elif main_question_text is not None:
-
-            question_paragraphs = []
-            start_iteration = False
-            for element in root.iter():
-                if element.tag == 'p':
-                    start_iteration = True
-                if start_iteration:
-                    if element.tag == 'p':
-                        question_paragraphs.append(element.text)
-                    else:
-                        break
-            html_output += f"""
-<pl-question-panel>
-"""         
-            for paragraph in question_paragraphs:
-                html_output += f"""
-<p>{paragraph}</p>
-"""
-            html_output += f"""
-</pl-question-panel>
-"""
-        py_output = f"""
-def generate(data):
-"""
-        # if there is only single numerical responses
-        if len(numresponses) == 1:
-            if verbose:
-                print("case 1: 1 numerical response")
-
-            html_output += f"""
-<div class="card my-2">
-    <div class="card-body">
-        <pl-number-input answers-name="ans" label="$ans=$" rtol="1e-2" atol="1e-2"></pl-number-input>
-    </div>
-</div>
-"""     
-            py_output += f"""
-    data["correct_answers"]["ans"] = {numresponses[0].attrib["answer"]}
-"""
-        # if there are multiple numerical responses
-        # see problem problem\3764d3faa7694190a9af35862fc57b95.xml
-        elif len(numresponses) > 1 and len(uls) == len(numresponses) and len(uls) > 0:
-            if verbose:
-                print("case 2: multi numerical, has uls")
-            num_of_responses = len(numresponses)
-            for idx in range(num_of_responses):
-                # locate <li> inside <ul>
-                assert("li_inside_ul_doesnot_exist", uls[idx].findall("./*"))
-                sub_question_text = uls[idx][0].text.strip()
-                sub_question_ans = numresponses[idx].attrib["answer"]
-                if verbose:
-                    print(sub_question_text)
-                    print(numresponses[idx].attrib["answer"])
-                html_output += f"""
-<div class="card my-2">
-    <div class="card-body">
-        <pl-question-panel>
-        <p> {sub_question_text} </p>
-        </pl-question-panel>
-        <pl-number-input answers-name="ans_{idx+1}" label="$ans_{idx+1}=$" rtol="1e-2" atol="1e-2"></pl-number-input>
-    </div>
-</div>
-"""         
-                py_output += f"""
-    data["correct_answers"]["ans_{idx+1}"] = {sub_question_ans}
-"""
-        # if there are no uls
-        # see problem problem\7b78dc044afd491a8d840ef6a0f2353e.xml
-        elif len(numresponses) > 1 and  len(uls) != len(numresponses):
-            idx = 0
-            sub_question_ans = None
-            sub_question_text = ""
-            read_p_label = False
-            if verbose:
-                print("case 3: multiple numericals, some uls")
-            for element in root.iter():
-                # print(element.tag)
-                if element.tag == 'numericalresponse':
-                    html_output += f"""
-<div class="card my-2">
-    <div class="card-body">
-        <pl-question-panel>
-        <p> {sub_question_text} </p>
-        </pl-question-panel>
-        <pl-number-input answers-name="ans_{idx+1}" label="$ans_{idx+1}=$" rtol="1e-2" atol="1e-2"></pl-number-input>
-    </div>
-</div>
-"""                 
-                    sub_question_ans = element.attrib["answer"]
-                    py_output += f"""
-    data["correct_answers"]["ans_{idx+1}"] = {sub_question_ans}
-"""
-                    idx += 1
-                    sub_question_text = ""
-                    read_p_label = True
+    elif ir.problem_format == "numerical":
+        return {HTML_OUTPUT_FILENAME: renderNumericalHtml(ir),
+                PYTHON_OUTPUT_FILENAME: renderServerPy(ir)}
 
-                if element.tag == 'p' and read_p_label:
-                        sub_question_text += element.text.strip()
-                        sub_question_text += ' '
+    return dict()
 
 
-        else:
-            print("case 4: *** undefined case ***")
+def xmlToHtml(prob_path: str, output_base_directory: str, sink=None):
+    """
+    Dumps problem descriptions into .html file
+    (and server.py for numerical response problems),
+    the /static/ files the problem references go into its clientFilesQuestion folder
 
-        # if there are any hints to this problem
-        # parse them to the end of the problem
-        if len(hints) > 0:
-            html_output += """
-<pl-hidden-hints>
-"""
-            for hint in hints:
-                hint_text = hint.text
-                if len(hint_text.strip()) == 0:
-                    for element in hint:
-                        hint_text += element.text.strip()
-                html_output += f"""
-<pl-hint show-after-submission={SHOW_HINT_AFTER}>
-{hint_text}
-</pl-hint>
-"""
-            html_output += """
-</pl-hidden-hints>
-"""
+    The problem is read once into a ProblemIR (see problemIR.py),
+    the renderers above only read from it
 
-        # if there are explanations to this problem
-        # parse them to the end of the problem
-        if explanations is not None:
-            for explanation in explanations:
-                html_output += """
-<pl-answer-panel>
-    <div class="detailed-solution">
-"""         
-                for element in explanation:
-                    if element.text is not None:
-                        explanation_text = element.text.strip()
-                        html_output += f"""
-    <p>{explanation_text}</p>
-"""     
-
-                html_output += """
-    </div>
-</pl-answer-panel>
-"""
-        # dump output file
-        with open(os.path.join(output_base_directory, HTML_OUTPUT_FILENAME), "w", encoding="utf-8") as html_file:
-            html_file.write(html_output)
-        with open(os.path.join(output_base_directory, PYTHON_OUTPUT_FILENAME), "w", encoding="utf-8") as py_file:
-            py_file.write(py_output)
+    :param : sink: where the files go (see outputSink), defaults to the file system
+    """
+    assert isinstance(prob_path, str)
+    assert isinstance(output_base_directory, str)
+
+    if sink is None:
+        sink = FILE_SYSTEM_SINK
+
+    # load xml data, the chapter traversal usually parsed it already
+    prob_key = os.path.splitext(os.path.basename(prob_path))[0] # url_name, key of the stage timings
+    with stage(prob_key, "parse"):
+        prob_tree = parseXml(prob_path)
+    with stage(prob_key, "classify"):
+        ir = extractProblem(prob_tree.getroot())
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("problem format", extra={"fields": {"url_name": prob_key, "format": ir.problem_format}})
+
+    with stage(prob_key, "render"):
+        output_files = renderProblemFiles(ir)
+        assets = dict()
+        if HTML_OUTPUT_FILENAME in output_files:
+            assets = resolveStaticAssets(ir.static_references, staticDirectory(prob_path))
+            output_files[HTML_OUTPUT_FILENAME] = rewriteStaticReferences(output_files[HTML_OUTPUT_FILENAME], assets)
+
+    # dump output files
+    with stage(prob_key, "write"):
+        for filename, content in output_files.items():
+            sink.write(os.path.join(output_base_directory, filename), content)
+        for asset_name, source_path in assets.items():
+            sink.linkFile(source_path, os.path.join(output_base_directory, CLIENT_FILES_DIRECTORY, asset_name))
 
 if __name__ == "__main__":
     
@@ -1,10 +1,58 @@
 import xml.etree.ElementTree as ET
 import os
 import uuid
+import json
+import logging
+from incremental import stableUuid
+from outputSink import FILE_SYSTEM_SINK
+from stageTimer import stage
+from eventLog import getLogger
 
-def xmlToJson(question_title: str, topic: str, tags: list, output_base_directory: str, source_url: str):
+JSON_OUTPUT_FILENAME = "info.json"
+
+log = getLogger("xmlToJson")
+
+
+def renderInfoJson(question_title: str, topic: str, tags: list, source_url: str = None, use_uuid: bool = True,
+                   question_id: str = None):
+    """
+    Content of the problem info.json
+
+    :param : question_id: str, question folder relative to the course output, one url_name
+             can be converted into several folders and every folder needs its own uuid
+    """
+    # UUID (Version 5) from the url_name and the question folder, random UUID (Version 4) without a url_name
+    if source_url is None:
+        question_uuid = uuid.uuid4()
+    elif question_id is None:
+        question_uuid = stableUuid(source_url)
+    else:
+        question_uuid = stableUuid(f"{source_url}:{question_id}")
+
+    # add uuid, title, topic and tags
+    info = dict()
+    if use_uuid:
+        info["uuid"] = str(question_uuid)
+    info["comment"] = f"source url: {source_url}"
+    info["title"] = question_title
+    info["topic"] = topic
+    if len(tags) > 0:
+        info["tags"] = tags
+    info["type"] = "v3"
+
+    # serialize once, titles may contain quotes
+    return json.dumps(info, indent=4, ensure_ascii=False) + "\n"
+
+
+def xmlToJson(question_title: str, topic: str, tags: list, output_base_directory: str, source_url: str = None,
+              sink=None, question_id: str = None):
     """
     Dump meta data to problem .json file
+
+    The uuid is derived from source_url (edX url_name) and question_id so it is stable
+    between runs and unique per question folder, a random uuid is used when no source_url is given
+
+    :param : sink: where the file goes (see outputSink), defaults to the file system
     """
     assert isinstance(question_title, str)
     assert isinstance(topic, str)
@@ -15,65 +63,21 @@ def xmlToJson(question_title: str, topic: str, tags: list, output_base_directory
     assert isinstance(output_base_directory, str)
     
     # Constants and Variables
-    verbose = False
-    JSON_OUTPUT_FILENAME = "info.json"
-    use_random_uuid = True
-
-
-    # Generate a random UUID (Version 4)
-    random_uuid = uuid.uuid4()
-    if verbose:
-        print('-'*10)
-        print("Dumping .json metadata")
-        print("Random UUID (Version 4):", random_uuid)
-        print("Question Title: ", question_title)
-        print(f"topic: {topic}, tags: {tags}")
-        print("output_base_direactory: ", output_base_directory)
-
-    # add uuid, title, and topic
-    json_output = """
-{
-"""
-    if use_random_uuid:
-        json_output += f"""
-    "uuid": "{random_uuid}",
-    "comment": "source url: {source_url}",
-    "title": "{question_title}",
-    "topic": "{topic}",
-"""
-    else: 
-        json_output += f"""
-    "comment": "source url: {source_url}",
-    "title": "{question_title}",
-    "topic": "{topic}",
-"""
-
-    # add tags
-    if len(tags) > 0:
-        json_output += """
-    "tags": [
-"""
-        for tag in tags:
-            # last tag no comma
-            if tag is tags[-1]:
-                json_output += f"""
-    "{tag}"
-"""
-                break
-            json_output += f"""
-    "{tag}",
-"""
-        json_output += """
-    ],
-"""
-
-    json_output += """
-    "type": "v3"
-}
-"""
-
-    with open(os.path.join(output_base_directory, JSON_OUTPUT_FILENAME), "w", encoding="utf-8") as json_file:
-        json_file.write(json_output)
+    use_uuid = True
+    if sink is None:
+        sink = FILE_SYSTEM_SINK
+
+
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("question metadata", extra={"fields": {"title": question_title, "topic": topic, "tags": tags,
+                                                         "output_directory": output_base_directory}})
+
+    with stage(source_url, "render"):
+        json_output = renderInfoJson(question_title, topic, tags, source_url=source_url, use_uuid=use_uuid,
+                                     question_id=question_id)
+
+    with stage(source_url, "write"):
+        sink.write(os.path.join(output_base_directory, JSON_OUTPUT_FILENAME), json_output)
 
 if __name__ == "__main__":
     # sample kwargs